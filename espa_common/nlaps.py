@@ -1,18 +1,144 @@
 import os
+import mmap
+import bisect
+import tempfile
+import threading
 
 ''' This is a simple lookup to determine if a Landsat 5 scene is TMA or not '''
 
+# Landsat scene ids are fixed width.  The index holds the ids from nlaps.txt
+# sorted and concatenated so it can be memory mapped and binary searched.
+RECORD_LENGTH = 21
+
+# The index starts with the modification time and size of the nlaps.txt it
+# was built from, padded to this length
+HEADER_LENGTH = 64
+
+
+def source_stamp(path):
+    '''Identifies the version of the text list of scenes
+
+    Keyword args:
+    path - Full path to the text list
+
+    Returns:
+    The index header for the file
+    '''
+
+    st = os.stat(path)
+    return ('%r %d' % (st.st_mtime, st.st_size)).ljust(HEADER_LENGTH)
+
+
+def build_index(path, index_path, stamp=None):
+    '''Builds the sorted fixed width index from the text list of scenes
+
+    Keyword args:
+    path - Full path to the text list, one scene id per line
+    index_path - Full path for the index
+    stamp - The source_stamp() of the list, read from it if not supplied
+
+    Returns:
+    The index records, without the header
+    '''
+
+    if stamp is None:
+        stamp = source_stamp(path)
+
+    with open(path, 'rb') as nl:
+        keys = set(k.strip() for k in nl)
+
+    data = ''.join(sorted(k for k in keys if len(k) == RECORD_LENGTH))
+
+    # write to a temporary file first so readers never see a partial index
+    (fd, temp_path) = tempfile.mkstemp(dir=os.path.dirname(index_path))
+    try:
+        with os.fdopen(fd, 'wb') as index_fd:
+            index_fd.write(stamp)
+            index_fd.write(data)
+        os.chmod(temp_path, 0644)
+        os.rename(temp_path, index_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    return data
+
 
 class NLAPS(object):
 
     def __init__(self):
         self.path = os.path.dirname(__file__)
         self.path = os.path.join(self.path, 'nlaps.txt')
+        self.index_path = os.path.splitext(self.path)[0] + '.idx'
+        self.stamp = source_stamp(self.path)
+
+        # offset of the first record in self.records
+        self.offset = HEADER_LENGTH
+
+        self.records = self._load()
+        self.count = (len(self.records) - self.offset) / RECORD_LENGTH
 
-        with open(self.path, 'rb') as nl:
-            data = nl.read()
-            self.keys = {k.strip():True for k in data.split('\n')}
-            data = None
+    def _read_stamp(self):
+        '''Returns the header of the existing index, None if there isn't
+        one'''
+
+        try:
+            with open(self.index_path, 'rb') as index_fd:
+                return index_fd.read(HEADER_LENGTH)
+        except (IOError, OSError):
+            return None
+
+    def _load(self):
+        '''Memory maps the index, building it first if it wasn't built from
+        the current nlaps.txt.  The index is held in memory if it can't be
+        written.'''
+
+        try:
+            if self._read_stamp() != self.stamp:
+                build_index(self.path, self.index_path, self.stamp)
+        except (IOError, OSError):
+            with open(self.path, 'rb') as nl:
+                keys = set(k.strip() for k in nl)
+            self.offset = 0
+            return ''.join(sorted(k for k in keys
+                                  if len(k) == RECORD_LENGTH))
+
+        with open(self.index_path, 'rb') as index_fd:
+            return mmap.mmap(index_fd.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        start = self.offset + index * RECORD_LENGTH
+        return self.records[start:start + RECORD_LENGTH]
+
+    def __contains__(self, product_id):
+        if len(product_id) != RECORD_LENGTH:
+            return False
+
+        index = bisect.bisect_left(self, product_id)
+
+        return index < self.count and self[index] == product_id
+
+
+_lookup = None
+_lookup_lock = threading.Lock()
+
+
+def get_lookup():
+    '''Returns the process wide lookup, loading it on first use and again
+    whenever nlaps.txt changes'''
+
+    global _lookup
+
+    with _lookup_lock:
+        if (_lookup is None or
+                source_stamp(_lookup.path) != _lookup.stamp):
+            _lookup = NLAPS()
+
+        return _lookup
 
 
 def products_are_nlaps(product_list):
@@ -22,9 +148,15 @@ def products_are_nlaps(product_list):
 
     results = []
 
-    nl = NLAPS()
+    nl = get_lookup()
 
     for p in product_list:
-        if p in nl.keys:
+        if p in nl:
             results.append(p)
     return results
+
+
+if __name__ == '__main__':
+    # Allows the index to be built at install time
+    nl = get_lookup()
+    print("Indexed %d nlaps scenes in %s" % (len(nl), nl.index_path))
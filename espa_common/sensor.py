@@ -4,6 +4,8 @@ configured values for each product
 
 import settings
 import utilities
+import collections
+import threading
 import re
 
 
@@ -255,6 +257,77 @@ class LandsatOLI(Landsat):
         super(LandsatOLI, self).__init__(product_id)
 
 
+# Patterns for the supported products keyed on the prefix which identifies
+# them.  Landsat products are identified by their first three characters and
+# modis products by their short name.
+_MODIS_PATTERN = r'\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$'
+
+PRODUCT_PATTERNS = {
+    'lt4': (r'^lt4\d{3}\d{3}\d{4}\d{3}[a-z]{3}[a-z0-9]{2}$', LandsatTM),
+    'lt5': (r'^lt5\d{3}\d{3}\d{4}\d{3}[a-z]{3}[a-z0-9]{2}$', LandsatTM),
+    'le7': (r'^le7\d{3}\d{3}\d{4}\d{3}\w{3}.{2}$', LandsatETM),
+    'lc8': (r'^lc8\d{3}\d{3}\d{4}\d{3}\w{3}.{2}$', LandsatOLITIRS),
+    'lo8': (r'^lo8\d{3}\d{3}\d{4}\d{3}\w{3}.{2}$', LandsatOLI),
+    'mod09a1': (r'^mod09a1' + _MODIS_PATTERN, ModisTerra09A1),
+    'mod09ga': (r'^mod09ga' + _MODIS_PATTERN, ModisTerra09GA),
+    'mod09gq': (r'^mod09gq' + _MODIS_PATTERN, ModisTerra09GQ),
+    'mod09q1': (r'^mod09q1' + _MODIS_PATTERN, ModisTerra09Q1),
+    'mod13a1': (r'^mod13a1' + _MODIS_PATTERN, ModisTerra13A1),
+    'mod13a2': (r'^mod13a2' + _MODIS_PATTERN, ModisTerra13A2),
+    'mod13a3': (r'^mod13a3' + _MODIS_PATTERN, ModisTerra13A3),
+    'mod13q1': (r'^mod13q1' + _MODIS_PATTERN, ModisTerra13Q1),
+    'myd09a1': (r'^myd09a1' + _MODIS_PATTERN, ModisAqua09A1),
+    'myd09ga': (r'^myd09ga' + _MODIS_PATTERN, ModisAqua09GA),
+    'myd09gq': (r'^myd09gq' + _MODIS_PATTERN, ModisAqua09GQ),
+    'myd09q1': (r'^myd09q1' + _MODIS_PATTERN, ModisAqua09Q1),
+    'myd13a1': (r'^myd13a1' + _MODIS_PATTERN, ModisAqua13A1),
+    'myd13a2': (r'^myd13a2' + _MODIS_PATTERN, ModisAqua13A2),
+    'myd13a3': (r'^myd13a3' + _MODIS_PATTERN, ModisAqua13A3),
+    'myd13q1': (r'^myd13q1' + _MODIS_PATTERN, ModisAqua13Q1)
+}
+
+# Compiled once so a product id is matched against a single pattern, found
+# by looking up each of the known prefix lengths
+_recognizers = dict((prefix, (re.compile(pattern), product_class))
+                    for (prefix, (pattern, product_class))
+                    in PRODUCT_PATTERNS.iteritems())
+
+_prefix_lengths = sorted(set(len(prefix) for prefix in PRODUCT_PATTERNS))
+
+# Most recently used product ids and the products created for them
+_instance_cache = collections.OrderedDict()
+_instance_cache_lock = threading.Lock()
+
+
+def _copy_product(product):
+    '''Shallow copies a product, much faster than copy.copy for these simple
+    objects'''
+
+    clone = object.__new__(product.__class__)
+    clone.__dict__.update(product.__dict__)
+
+    return clone
+
+
+def recognize(product_id):
+    '''Determines the product class for a product id
+
+    Keyword args:
+    product_id -- The product id, without file extension, in lower case
+
+    Return:
+    The SensorProduct subclass or None if the product is not supported
+    '''
+
+    for length in _prefix_lengths:
+        recognizer = _recognizers.get(product_id[0:length])
+
+        if recognizer is not None and recognizer[0].match(product_id):
+            return recognizer[1]
+
+    return None
+
+
 def instance(product_id):
     '''
     Supported MODIS products
@@ -267,8 +340,19 @@ def instance(product_id):
     LT4 LT5 LE7 LC8
 
     LANDSAT FORMAT: LE72181092013069PFS00
+
+    Recently requested products are cached, a copy of the cached product is
+    returned so callers are free to modify it.
     '''
 
+    with _instance_cache_lock:
+        product = _instance_cache.pop(product_id, None)
+        if product is not None:
+            _instance_cache[product_id] = product
+            return _copy_product(product)
+
+    cache_key = product_id
+
     # remove known file extensions before comparison
     # do not alter the case of the actual product_id!
     _id = product_id.lower().strip()
@@ -285,71 +369,20 @@ def instance(product_id):
         product_id = product_id[0:index]
         _id = _id[0:index]
 
-    instances = {
-        'tm': (r'^lt[4|5]\d{3}\d{3}\d{4}\d{3}[a-z]{3}[a-z0-9]{2}$',
-               LandsatTM),
-
-        'etm': (r'^le7\d{3}\d{3}\d{4}\d{3}\w{3}.{2}$',
-                LandsatETM),
-
-        'olitirs': (r'^lc8\d{3}\d{3}\d{4}\d{3}\w{3}.{2}$',
-                    LandsatOLITIRS),
-
-        'oli': (r'^lo8\d{3}\d{3}\d{4}\d{3}\w{3}.{2}$',
-                LandsatOLI),
-
-        'mod09a1': (r'^mod09a1\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisTerra09A1),
-
-        'mod09ga': (r'^mod09ga\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisTerra09GA),
-
-        'mod09gq': (r'^mod09gq\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisTerra09GQ),
-
-        'mod09q1': (r'^mod09q1\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisTerra09Q1),
-
-        'mod13a1': (r'^mod13a1\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisTerra13A1),
-
-        'mod13a2': (r'^mod13a2\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisTerra13A2),
-
-        'mod13a3': (r'^mod13a3\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisTerra13A3),
-
-        'mod13q1': (r'^mod13q1\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisTerra13Q1),
-
-        'myd09a1': (r'^myd09a1\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisAqua09A1),
-
-        'myd09ga': (r'^myd09ga\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisAqua09GA),
-
-        'myd09gq': (r'^myd09gq\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisAqua09GQ),
-
-        'myd09q1': (r'^myd09q1\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisAqua09Q1),
-
-        'myd13a1': (r'^myd13a1\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisAqua13A1),
+    product_class = recognize(_id)
 
-        'myd13a2': (r'^myd13a2\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisAqua13A2),
+    if product_class is None:
+        msg = "[%s] is not a supported sensor product" % product_id
+        raise ProductNotImplemented(product_id, msg)
 
-        'myd13a3': (r'^myd13a3\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisAqua13A3),
+    product = product_class(product_id.strip())
 
-        'myd13q1': (r'^myd13q1\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$',
-                    ModisAqua13Q1)
-    }
+    if settings.SENSOR_INSTANCE_CACHE_SIZE > 0:
+        with _instance_cache_lock:
+            _instance_cache[cache_key] = product
+            while len(_instance_cache) > settings.SENSOR_INSTANCE_CACHE_SIZE:
+                _instance_cache.popitem(last=False)
 
-    for key in instances.iterkeys():
-        if re.match(instances[key][0], _id):
-            return instances[key][1](product_id.strip())
+        product = _copy_product(product)
 
-    msg = "[%s] is not a supported sensor product" % product_id
-    raise ProductNotImplemented(product_id, msg)
+    return product
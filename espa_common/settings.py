@@ -19,6 +19,13 @@ HADOOP_QUEUE_MAPPING = {
 # filename extension for landsat input products
 LANDSAT_INPUT_FILENAME_EXTENSION = '.tar.gz'
 
+# Extract Landsat input products while they are downloaded over http,
+# instead of staging the compressed file to disk first.  The stream uses a
+# single connection, so enabling this skips the TRANSFER_SEGMENTS segmented
+# download; it saves the disk space and the separate untar pass at the cost
+# of download concurrency
+LANDSAT_STREAMED_STAGING = False
+
 # Path to the MODIS Terra source data location
 TERRA_BASE_SOURCE_PATH = '/MOLT'
 # Path to the MODIS Aqua source data location
@@ -33,6 +40,25 @@ MODIS_INPUT_CHECK_HOST = 'e4ftl01.cr.usgs.gov'
 # port for modis input checks
 MODIS_INPUT_CHECK_PORT = 80
 
+# Maximum number of concurrent HEAD requests used to verify modis inputs.
+# This is also the size of the keep-alive connection pool.
+MODIS_INPUT_CHECK_WORKERS = 16
+
+# Maximum number of modis input check requests per second sent to any single
+# host.  None disables the rate limiting.
+MODIS_INPUT_CHECK_RATE = 50
+
+# Seconds to wait on a modis input check before considering it unavailable
+MODIS_INPUT_CHECK_TIMEOUT = 30
+
+# Maximum number of concurrent download url requests to LTA when building the
+# list of products to process.  LTA requires a request per contact.
+LTA_DOWNLOAD_URL_WORKERS = 8
+
+# Number of scenes retrieved per query when building the list of products to
+# process
+SCHEDULER_QUERY_CHUNK_SIZE = 500
+
 # Path to the completed orders
 ESPA_REMOTE_CACHE_DIRECTORY = '/data/science_lsrd/LSRD/orders'
 ESPA_LOCAL_CACHE_DIRECTORY = 'LSRD/orders'
@@ -41,6 +67,12 @@ ESPA_EMAIL_ADDRESS = 'espa@usgs.gov'
 
 ESPA_EMAIL_SERVER = 'gssdsflh01.cr.usgs.gov'
 
+# seconds to wait on the mail server before giving up on a connection
+ESPA_EMAIL_TIMEOUT = 60
+
+# messages sent over one mail server connection before reconnecting
+ESPA_EMAIL_MESSAGES_PER_CONNECTION = 100
+
 # Default resolution for browse generation
 DEFAULT_BROWSE_RESOLUTION = 50
 
@@ -64,6 +96,12 @@ MAX_DISTRIBUTION_ATTEMPTS = 5
 # Maximum number of times to attempt setting the scene error
 MAX_SET_SCENE_ERROR_ATTEMPTS = 5
 
+# Number of status updates and completions the processing tier buffers before
+# sending them to the web tier in a single call, and the maximum number of
+# seconds any of them waits
+STATUS_UPDATE_BATCH_SIZE = 50
+STATUS_UPDATE_FLUSH_SECONDS = 30
+
 # List of hostnames to choose from for the access to the online cache
 # Runs over 10Gb line
 ESPA_CACHE_HOST_LIST = ['edclxs67p', 'edclxs140p']
@@ -72,9 +110,20 @@ ESPA_CACHE_HOST_LIST = ['edclxs67p', 'edclxs140p']
 EXTERNAL_CACHE_HOST = 'edclpdsftp.cr.usgs.gov'
 
 # Specify the checksum tool and filename extension
+# The algorithm must be the hashlib equivalent of the tool
 ESPA_CHECKSUM_TOOL = 'md5sum'
+ESPA_CHECKSUM_ALGORITHM = 'md5'
 ESPA_CHECKSUM_EXTENSION = 'md5'
 
+# Package products by compressing with multiple threads (pigz when
+# available) while generating the checksum and verifying the archive in the
+# same pass, instead of separate tar, tar -t, and checksum passes
+PACKAGING_STREAMED = True
+
+# Number of compression threads to use when packaging.  None uses the number
+# of available cores.
+PACKAGING_THREADS = None
+
 # Where to place the temporary scene processing log files
 LOGFILE_PATH = '/tmp'
 
@@ -98,9 +147,44 @@ NAD83 = 'NAD83'
 
 TRANSFER_BLOCK_SIZE = 10485760
 
+# Number of concurrent segments to use when staging input products over http
+# and the minimum file size in bytes worth splitting into segments
+TRANSFER_SEGMENTS = 4
+TRANSFER_SEGMENT_MIN_SIZE = 52428800
+
+# Total gdalwarp working memory (-wm) in MB, divided between the bands being
+# warped concurrently
+WARP_MEMORY_BUDGET = 2048
+
+# Number of bands to warp concurrently.  None uses the number of available
+# cores.
+WARP_WORKERS = None
+
+# Warping engine to use, 'gdalwarp' executes the gdalwarp application and
+# 'gdal_api' warps in-process using the GDAL python bindings (GDAL >= 2.1)
+WARP_ENGINE = 'gdalwarp'
+
+# The number of segments each side of a geographic box is initially divided
+# into when determining the projected minbox.  The sides are densified from
+# there until the extents change by less than MINBOX_TOLERANCE pixels.
+MINBOX_INITIAL_SEGMENTS = 64
+MINBOX_TOLERANCE = 0.01
+
+# Maximum number of entries kept in each of the warp projection caches, the
+# least recently used are discarded first.  0 disables the caching.
+PROJECTION_CACHE_SIZE = 1000
+
 # We do not allow any user selectable choices for this projection
 GEOGRAPHIC_PROJ4_STRING = "+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs"
 
+# Maximum number of bytes of working memory to use per band when generating
+# statistics.  The band is memory mapped and streamed in chunks sized to fit.
+STATISTICS_MEMORY_BUDGET = 67108864  # 64MB
+
+# Number of processes to use when generating statistics.  None uses the
+# number of available cores.  Each process uses up to the memory budget above.
+STATISTICS_WORKERS = None
+
 # Band type data ranges.  They are intended to be used for removing outliers
 # from the data before statistics generation
 # Must match DATA_MAX_Y and DATA_MIN_Y values in plotting.py
@@ -144,6 +228,10 @@ SENSOR_INFO = {
     'MOD': {'name': 'terra'}
 }
 
+# Number of recently used product ids to keep parsed products for in
+# sensor.instance
+SENSOR_INSTANCE_CACHE_SIZE = 10000
+
 '''Default pixel sizes based on the input products'''
 DEFAULT_PIXEL_SIZE = {
     'meters': {
@@ -192,6 +280,25 @@ SOAP_CLIENT_TIMEOUT = 60 * 30
 # location where the WSDLS should be cached
 SOAP_CACHE_LOCATION = '/tmp/suds'
 
+# seconds to wait on a response from LTA
+LTA_TIMEOUT = 300
+
+# LTA_TIMEOUT overrides for individual services, logins are made while the
+# user waits so shouldn't be left hanging
+LTA_SERVICE_TIMEOUTS = {'registration': 60}
+
+# maximum number of concurrent requests to LTA
+LTA_WORKERS = 8
+
+# number of scenes sent to LTA in each scene verification request
+LTA_VERIFY_CHUNK_SIZE = 1000
+
+# number of EE orders loaded and committed together
+EE_ORDER_CHUNK_SIZE = 100
+
+# maximum number of rows inserted by each statement of a bulk insert
+BULK_CREATE_BATCH_SIZE = 1000
+
 
 ''' Dictionary containing retry timeouts in seconds'''
 RETRY = {
@@ -17,6 +17,12 @@ import errno
 import datetime
 import commands
 import random
+import signal
+import hashlib
+import tempfile
+import subprocess
+import multiprocessing
+from distutils.spawn import find_executable
 
 # local objects and methods
 import settings
@@ -209,6 +215,145 @@ def tar_files(tarred_full_path, file_list, gzip=False):
     return target
 
 
+def restore_sigpipe():
+    '''
+    Description:
+      Restore the default SIGPIPE handling, which python ignores, for child
+      processes which are part of a pipeline.
+    '''
+
+    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+
+
+def get_gzip_command(threads=None):
+    '''
+    Description:
+      Build the command for gzip compressing stdin to stdout.  pigz is used
+      with the specified number of threads when it is available, and
+      produces standard gzip output.
+    '''
+
+    if find_executable('pigz') is None:
+        return ['gzip', '-c']
+
+    if threads is None:
+        threads = settings.PACKAGING_THREADS
+    if threads is None:
+        try:
+            threads = multiprocessing.cpu_count()
+        except NotImplementedError:
+            threads = 1
+
+    return ['pigz', '-p', str(threads), '-c']
+
+
+def tar_gzip_checksum_files(tarred_full_path, file_list, threads=None):
+    '''
+    Description:
+      Create a tar.gz ball (*.tar.gz) of the specified file(s) in a single
+      streaming pass.  The archive is compressed using multiple threads, the
+      checksum is calculated from the bytes as they are written, and the
+      archive index is verified by listing those same bytes with tar.
+
+    Returns:
+      target - The full path to the *.tar.gz file
+      cksum_value - The hex digest using settings.ESPA_CHECKSUM_ALGORITHM
+      listing - The archive index as reported by tar
+    '''
+
+    target = '%s.tar.gz' % tarred_full_path
+
+    tar_cmd = ['tar', '-cf', '-']
+    tar_cmd.extend(file_list)
+    gzip_cmd = get_gzip_command(threads)
+    list_cmd = ['tar', '-tzf', '-']
+
+    checksum = hashlib.new(settings.ESPA_CHECKSUM_ALGORITHM)
+
+    tar_err = tempfile.TemporaryFile()
+    gzip_err = tempfile.TemporaryFile()
+    list_out = tempfile.TemporaryFile()
+
+    processes = list()
+    try:
+        tar_proc = subprocess.Popen(tar_cmd, stdout=subprocess.PIPE,
+                                    stderr=tar_err,
+                                    preexec_fn=restore_sigpipe,
+                                    close_fds=True)
+        processes.append(tar_proc)
+
+        gzip_proc = subprocess.Popen(gzip_cmd, stdin=tar_proc.stdout,
+                                     stdout=subprocess.PIPE,
+                                     stderr=gzip_err,
+                                     preexec_fn=restore_sigpipe,
+                                     close_fds=True)
+        processes.append(gzip_proc)
+        # Only the compressor should be reading from tar
+        tar_proc.stdout.close()
+
+        list_proc = subprocess.Popen(list_cmd, stdin=subprocess.PIPE,
+                                     stdout=list_out,
+                                     stderr=subprocess.STDOUT,
+                                     preexec_fn=restore_sigpipe,
+                                     close_fds=True)
+        processes.append(list_proc)
+
+        feed_listing = True
+        with open(target, 'wb') as target_fd:
+            while True:
+                data = gzip_proc.stdout.read(settings.TRANSFER_BLOCK_SIZE)
+                if not data:
+                    break
+
+                target_fd.write(data)
+                checksum.update(data)
+
+                if feed_listing:
+                    try:
+                        list_proc.stdin.write(data)
+                    except IOError:
+                        # tar stopped reading, its status tells us if it
+                        # found the end of the archive
+                        feed_listing = False
+
+        try:
+            list_proc.stdin.close()
+        except IOError:
+            pass
+
+        statuses = [process.wait() for process in processes]
+        processes = list()
+
+        # Report any failure
+        for (cmd, status, err_fd) in [(tar_cmd, statuses[0], tar_err),
+                                      (gzip_cmd, statuses[1], gzip_err),
+                                      (list_cmd, statuses[2], list_out)]:
+            if status != 0:
+                err_fd.seek(0)
+                output = err_fd.read()
+                msg = ("Error encountered tar'ing file(s): Application [%s]"
+                       " returned error code [%d]" % (' '.join(cmd), status))
+                if len(output) > 0:
+                    msg = ' Stdout/Stderr is: '.join([msg, output])
+                raise Exception(msg)
+
+        list_out.seek(0)
+        listing = list_out.read()
+
+    finally:
+        # Make sure nothing is left running when an error occurred
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+        tar_err.close()
+        gzip_err.close()
+        list_out.close()
+
+    return (target, checksum.hexdigest(), listing)
+
+
 def gzip_files(file_list):
     '''
     Description:
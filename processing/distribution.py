@@ -83,37 +83,59 @@ def package_product(source_directory, destination_directory, product_name):
         # Grab the files to tar and gzip
         product_files = glob.glob("*")
 
-        # Execute tar with zipping, the full/path/*.tar.gz name is returned
-        product_full_path = utilities.tar_files(product_full_path,
-                                                product_files, gzip=True)
+        if settings.PACKAGING_STREAMED:
+            # Compress, checksum, and verify the archive in a single pass
+            # the full/path/*.tar.gz name is returned
+            output = ''
+            try:
+                (product_full_path, cksum_output, output) = \
+                    utilities.tar_gzip_checksum_files(product_full_path,
+                                                      product_files)
+            except Exception as e:
+                raise ee.ESPAException(ee.ErrorCodes.packaging_product,
+                                       str(e)), None, sys.exc_info()[2]
+            finally:
+                if len(output) > 0:
+                    logger.info(output)
 
-        # Change file permissions
-        logger.info("Changing file permissions on %s to 0644"
-                    % product_full_path)
-        os.chmod(product_full_path, 0644)
+            # Change file permissions
+            logger.info("Changing file permissions on %s to 0644"
+                        % product_full_path)
+            os.chmod(product_full_path, 0644)
 
-        # Verify that the archive is good
-        output = ''
-        cmd = ' '.join(['tar', '-tf', product_full_path])
-        try:
-            output = utilities.execute_cmd(cmd)
-        except Exception as e:
-            raise ee.ESPAException(ee.ErrorCodes.packaging_product,
-                                   str(e)), None, sys.exc_info()[2]
-        finally:
-            if len(output) > 0:
-                logger.info(output)
+        else:
+            # Execute tar with zipping, the full/path/*.tar.gz name is
+            # returned
+            product_full_path = utilities.tar_files(product_full_path,
+                                                    product_files, gzip=True)
 
-        # If it was good create a checksum file
-        cksum_output = ''
-        cmd = ' '.join([settings.ESPA_CHECKSUM_TOOL, product_full_path])
-        try:
-            cksum_output = utilities.execute_cmd(cmd)
-        except Exception as e:
-            if len(cksum_output) > 0:
-                logger.info(cksum_output)
-            raise ee.ESPAException(ee.ErrorCodes.packaging_product,
-                                   str(e)), None, sys.exc_info()[2]
+            # Change file permissions
+            logger.info("Changing file permissions on %s to 0644"
+                        % product_full_path)
+            os.chmod(product_full_path, 0644)
+
+            # Verify that the archive is good
+            output = ''
+            cmd = ' '.join(['tar', '-tf', product_full_path])
+            try:
+                output = utilities.execute_cmd(cmd)
+            except Exception as e:
+                raise ee.ESPAException(ee.ErrorCodes.packaging_product,
+                                       str(e)), None, sys.exc_info()[2]
+            finally:
+                if len(output) > 0:
+                    logger.info(output)
+
+            # If it was good create a checksum file
+            cksum_output = ''
+            cmd = ' '.join([settings.ESPA_CHECKSUM_TOOL, product_full_path])
+            try:
+                cksum_output = utilities.execute_cmd(cmd)
+            except Exception as e:
+                if len(cksum_output) > 0:
+                    logger.info(cksum_output)
+                raise ee.ESPAException(ee.ErrorCodes.packaging_product,
+                                       str(e)), None, sys.exc_info()[2]
 
         # Name of the checksum file created
         cksum_filename = '.'.join([product_name,
@@ -24,6 +24,7 @@ History:
 import sys
 import socket
 import json
+import threading
 import xmlrpclib
 from time import sleep
 from argparse import ArgumentParser
@@ -39,6 +40,198 @@ import parameters
 import processor
 
 
+# Status servers by xmlrpc url, shared by every product this mapper processes
+status_servers = dict()
+
+
+# ============================================================================
+class BufferedStatusServer(object):
+    '''
+    Description:
+        Wraps the xmlrpc server so status updates and completions are sent to
+        the web tier in batches.  The buffer is flushed once it holds
+        STATUS_UPDATE_BATCH_SIZE calls, every STATUS_UPDATE_FLUSH_SECONDS
+        from a background thread, and before any other server call, so the
+        server always sees the calls in the order they were made.
+    '''
+
+    def __init__(self, xmlrpcurl):
+        self.server = xmlrpclib.ServerProxy(xmlrpcurl, allow_none=True)
+        self.lock = threading.RLock()
+        self.statuses = list()
+        self.completions = list()
+        self.batch_supported = True
+
+        self.stopped = threading.Event()
+        self.flusher = threading.Thread(target=self._flush_periodically)
+        self.flusher.daemon = True
+        self.flusher.start()
+
+    def _flush_periodically(self):
+        '''
+        Description:
+            Keeps the buffered calls from waiting on a long running product.
+        '''
+
+        while not self.stopped.wait(settings.STATUS_UPDATE_FLUSH_SECONDS):
+            try:
+                self.flush()
+            except Exception:
+                logger = EspaLogging.get_logger('base')
+                logger.exception("Failed flushing buffered status updates,"
+                                 " they will be retried")
+
+    def _send(self, batch_method, single_method, calls):
+        '''
+        Description:
+            Send the buffered calls, falling back to one call at a time if the
+            server does not provide the batch method.  Calls are removed from
+            the buffer as they are sent.  The batch methods return the
+            products they could not find, which are logged.
+        '''
+
+        if self.batch_supported:
+            try:
+                missing = getattr(self.server, batch_method)(calls)
+                for (name, orderid) in missing:
+                    logger = EspaLogging.get_logger('base')
+                    logger.error("Failed processing xmlrpc call to %s:"
+                                 " scene %s not found for order %s"
+                                 % (batch_method, name, orderid))
+                del calls[:]
+                return
+            except xmlrpclib.Fault, e:
+                if e.faultString.find('is not supported') == -1:
+                    raise
+                self.batch_supported = False
+
+        while len(calls) > 0:
+            status = getattr(self.server, single_method)(*calls[0])
+            if not status:
+                logger = EspaLogging.get_logger('base')
+                logger.warning("Failed processing xmlrpc call to %s"
+                               % single_method)
+            del calls[0]
+
+    def flush(self):
+        '''
+        Description:
+            Send all buffered calls.  Status updates are sent first since a
+            product's completion always follows its status update.
+        '''
+
+        with self.lock:
+            if len(self.statuses) > 0:
+                self._send('update_statuses', 'update_status', self.statuses)
+            if len(self.completions) > 0:
+                self._send('mark_scenes_complete', 'mark_scene_complete',
+                           self.completions)
+
+    def _buffer(self, calls, args):
+        '''
+        Description:
+            Buffer the call, flushing when the buffer is full.  A failed
+            flush belongs to the earlier buffered calls and not to this
+            product, so it is logged and the calls are left for a retry.
+        '''
+
+        with self.lock:
+            calls.append(args)
+            if (len(self.statuses) + len(self.completions) >=
+                    settings.STATUS_UPDATE_BATCH_SIZE):
+                try:
+                    self.flush()
+                except Exception:
+                    logger = EspaLogging.get_logger('base')
+                    logger.exception("Failed flushing buffered status"
+                                     " updates, they will be retried")
+
+        return True
+
+    def update_status(self, *args):
+        return self._buffer(self.statuses, list(args))
+
+    def mark_scene_complete(self, *args):
+        return self._buffer(self.completions, list(args))
+
+    def __getattr__(self, name):
+        '''
+        Description:
+            Any other server call is made immediately, after the buffered
+            calls.
+        '''
+
+        method = getattr(self.server, name)
+
+        def call(*args):
+            with self.lock:
+                self.flush()
+                return method(*args)
+
+        return call
+
+    def close(self):
+        '''
+        Description:
+            Stop the background flushing and send everything remaining.
+            Provides a sleep retry implementation since these are the last
+            chance for the calls to reach the server.
+        '''
+
+        self.stopped.set()
+        self.flusher.join()
+
+        logger = EspaLogging.get_logger('base')
+
+        attempt = 0
+        sleep_seconds = settings.DEFAULT_SLEEP_SECONDS
+        while True:
+            try:
+                self.flush()
+                break
+            except Exception:
+                logger.exception("Failed flushing buffered status updates")
+
+                if attempt < settings.MAX_SET_SCENE_ERROR_ATTEMPTS:
+                    sleep(sleep_seconds)  # sleep before trying again
+                    attempt += 1
+                    sleep_seconds = int(sleep_seconds * 1.5)
+                    continue
+                else:
+                    logger.critical("Discarding %d status updates and %d"
+                                    " completions which could not be sent"
+                                    % (len(self.statuses),
+                                       len(self.completions)))
+                    break
+        # END - while True
+
+
+# ============================================================================
+def get_status_server(xmlrpcurl):
+    '''
+    Description:
+        Returns the buffered status server for the url, creating it on first
+        use.
+    '''
+
+    if xmlrpcurl not in status_servers:
+        status_servers[xmlrpcurl] = BufferedStatusServer(xmlrpcurl)
+
+    return status_servers[xmlrpcurl]
+
+
+# ============================================================================
+def close_status_servers():
+    '''
+    Description:
+        Send everything still buffered for every server.
+    '''
+
+    while len(status_servers) > 0:
+        (xmlrpcurl, server) = status_servers.popitem()
+        server.close()
+
+
 # ============================================================================
 def set_product_error(server, order_id, product_id, processing_location):
     '''
@@ -179,8 +372,7 @@ def process(args):
             # Update the status in the database
             if parameters.test_for_parameter(parms, 'xmlrpcurl'):
                 if parms['xmlrpcurl'] != 'skip_xmlrpc':
-                    server = xmlrpclib.ServerProxy(parms['xmlrpcurl'],
-                                                   allow_none=True)
+                    server = get_status_server(parms['xmlrpcurl'])
                     if server is not None:
                         status = server.update_status(product_id, order_id,
                                                       processing_location,
@@ -374,6 +566,8 @@ def process(args):
                                      " follows")
     # END - for line in STDIN
 
+    close_status_servers()
+
 
 # ============================================================================
 if __name__ == '__main__':
@@ -397,5 +591,7 @@ if __name__ == '__main__':
         process(args)
     except Exception, e:
         logger.exception("Processing failed stacktrace follows")
+    finally:
+        close_status_servers()
 
     sys.exit(0)
@@ -821,17 +821,30 @@ class LandsatProcessor(CDRProcessor):
                              settings.LANDSAT_INPUT_FILENAME_EXTENSION])
         staged_file = os.path.join(self._stage_dir, file_name)
 
+        # Stream the source data directly into the work directory
+        if (settings.LANDSAT_STREAMED_STAGING
+                and download_url.startswith('http')):
+            try:
+                staging.untar_url_data(download_url, self._work_dir)
+            except Exception as e:
+                raise ee.ESPAException(ee.ErrorCodes.staging_data,
+                                       str(e)), None, sys.exc_info()[2]
+            staged_file = None
+
         # Download the source data
-        try:
-            transfer.download_file_url(download_url, staged_file)
-        except Exception as e:
-            raise ee.ESPAException(ee.ErrorCodes.staging_data, str(e)), \
-                None, sys.exc_info()[2]
+        else:
+            try:
+                transfer.download_file_url(download_url, staged_file,
+                                           segments=settings.TRANSFER_SEGMENTS)
+            except Exception as e:
+                raise ee.ESPAException(ee.ErrorCodes.staging_data,
+                                       str(e)), None, sys.exc_info()[2]
 
         # Un-tar the input data to the work directory
         try:
-            staging.untar_data(staged_file, self._work_dir)
-            os.unlink(staged_file)
+            if staged_file is not None:
+                staging.untar_data(staged_file, self._work_dir)
+                os.unlink(staged_file)
 
             # Figure out the metadata filename
             try:
@@ -1720,7 +1733,8 @@ class ModisProcessor(CDRProcessor):
 
         # Download the source data
         try:
-            transfer.download_file_url(download_url, staged_file)
+            transfer.download_file_url(download_url, staged_file,
+                                       segments=settings.TRANSFER_SEGMENTS)
         except Exception as e:
             raise ee.ESPAException(ee.ErrorCodes.staging_data, str(e)), \
                 None, sys.exc_info()[2]
@@ -14,6 +14,8 @@ import os
 import sys
 import glob
 import errno
+import tempfile
+import subprocess
 
 # imports from espa_common
 from logger_factory import EspaLogging
@@ -57,6 +59,52 @@ def untar_data(source_file, destination_directory):
             logger.info(output)
 
 
+# ============================================================================
+def untar_url_data(download_url, destination_directory):
+    '''
+    Description:
+        Using tar extract the contents of a '*.tar.gz' file into a
+        destination directory while it is being downloaded.
+
+    Notes:
+        The compressed file is never written to disk, the bytes are handed
+        to tar as they arrive.
+    '''
+
+    logger = EspaLogging.get_logger(settings.PROCESSING_LOGGER)
+
+    cmd = ['tar', '--directory', destination_directory, '-xzvf', '-']
+
+    logger.info("Streaming and unpacking [%s] to [%s]"
+                % (download_url, destination_directory))
+
+    # tar's output is collected in a temporary file, so it can never block
+    # while we are feeding it data
+    with tempfile.TemporaryFile() as output_fd:
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                   stdout=output_fd,
+                                   stderr=subprocess.STDOUT)
+        try:
+            transfer.http_stream_file(download_url, process.stdin)
+        except Exception:
+            logger.error("Failed to stream data")
+            process.kill()
+            raise
+        finally:
+            process.stdin.close()
+            status = process.wait()
+
+            output_fd.seek(0)
+            output = output_fd.read()
+            if len(output) > 0:
+                logger.info(output)
+
+    if status != 0:
+        logger.error("Failed to unpack data")
+        raise Exception("Application [%s] returned error code [%d]"
+                        % (' '.join(cmd), status))
+
+
 # ============================================================================
 def stage_local_statistics_data(output_dir, work_dir, order_id):
     '''
@@ -15,6 +15,7 @@ import os
 import sys
 import glob
 import errno
+import multiprocessing
 from cStringIO import StringIO
 import numpy as np
 
@@ -30,6 +31,42 @@ import settings
 import espa_exception as ee
 
 
+# ============================================================================
+def get_band_data_type(band_type):
+    '''
+    Description:
+      Determine the numpy data type used to read the specified band type.
+    '''
+
+    data_type = np.int16
+    if band_type == 'LST':
+        data_type = np.uint16
+    elif band_type == 'EMIS':
+        data_type = np.uint8
+
+    return data_type
+# END - get_band_data_type
+
+
+# ============================================================================
+def get_statistics_chunk_length(data_type):
+    '''
+    Description:
+      Determine how many elements can be processed per chunk while staying
+      within settings.STATISTICS_MEMORY_BUDGET.
+
+    Notes:
+      Per element we need the boolean mask, the cleaned copy of the data, and
+      two float64 working arrays for the deviation calculation.
+    '''
+
+    item_size = np.dtype(data_type).itemsize
+    bytes_per_element = 1 + item_size + 2 * np.dtype(np.float64).itemsize
+
+    return max(1, settings.STATISTICS_MEMORY_BUDGET // bytes_per_element)
+# END - get_statistics_chunk_length
+
+
 # ============================================================================
 def get_statistics(file_name, band_type):
     '''
@@ -38,6 +75,12 @@ def get_statistics(file_name, band_type):
       The data is cleaned before stats are generated.  This cleaning is
       intended to remove fill and outliers from the statistics.
 
+    Notes:
+      The file is memory mapped and streamed in bounded chunks so only a
+      small portion of the band is resident at any time.  The mean and
+      standard deviation are accumulated in a single pass by merging the
+      per-chunk results (Welford/Chan).
+
     Returns:
       Minimum(float)
       Maximum(float)
@@ -46,29 +89,69 @@ def get_statistics(file_name, band_type):
     '''
 
     # Figure out the data type based on the band type
-    data_type = np.int16
-    if band_type == 'LST':
-        data_type = np.uint16
-    elif band_type == 'EMIS':
-        data_type = np.uint8
-
-    # Load the image data into memory
-    input_data = np.fromfile(file_name, dtype=data_type)
+    data_type = get_band_data_type(band_type)
 
     # Get the data bounds
     upper_bound = settings.BAND_TYPE_STAT_RANGES[band_type]['UPPER_BOUND']
     lower_bound = settings.BAND_TYPE_STAT_RANGES[band_type]['LOWER_BOUND']
 
-    # Clean the data
-    input_data = input_data[((input_data >= lower_bound)
-                             & (input_data <= upper_bound))]
+    # Figure out how many elements are in the file, ignoring any trailing
+    # partial element the same way np.fromfile does
+    element_count = (os.path.getsize(file_name)
+                     // np.dtype(data_type).itemsize)
+
+    count = 0
+    minimum = None
+    maximum = None
+    mean = 0.0
+    m2 = 0.0
+
+    if element_count > 0:
+        # Memory map the image data instead of loading it into memory
+        input_data = np.memmap(file_name, dtype=data_type, mode='r',
+                               shape=(element_count,))
+
+        chunk_length = get_statistics_chunk_length(data_type)
+
+        try:
+            for offset in xrange(0, element_count, chunk_length):
+                chunk = input_data[offset:offset + chunk_length]
+
+                # Clean the data
+                chunk = chunk[((chunk >= lower_bound)
+                               & (chunk <= upper_bound))]
+
+                chunk_count = chunk.size
+                if chunk_count == 0:
+                    continue
+
+                chunk_minimum = chunk.min()
+                chunk_maximum = chunk.max()
+
+                chunk = chunk.astype(np.float64)
+                chunk_mean = chunk.mean()
+                chunk -= chunk_mean
+                chunk_m2 = np.dot(chunk, chunk)
+                del chunk
+
+                # Merge this chunk into the running values
+                total_count = count + chunk_count
+                delta = chunk_mean - mean
+                mean += delta * chunk_count / total_count
+                m2 += (chunk_m2
+                       + delta * delta * count * chunk_count / total_count)
+                count = total_count
+
+                if minimum is None or chunk_minimum < minimum:
+                    minimum = chunk_minimum
+                if maximum is None or chunk_maximum > maximum:
+                    maximum = chunk_maximum
+        finally:
+            del input_data
 
     # Calculate the stats
-    if input_data.size > 0:
-        minimum = np.min(input_data)
-        maximum = np.max(input_data)
-        mean = np.mean(input_data)
-        stddev = np.std(input_data)
+    if count > 0:
+        stddev = np.sqrt(m2 / count)
         valid = 'yes'
     else:
         minimum = -9999.0
@@ -82,12 +165,54 @@ def get_statistics(file_name, band_type):
 
 
 # ============================================================================
-def generate_statistics(work_directory, files_to_search_for):
+def generate_file_statistics(stats_output_path, band_type, file_name):
+    '''
+    Description:
+      Generate the statistics for the specified file and write them to the
+      output stats file.
+
+    Notes:
+      Kept at the module level so it can be dispatched to a process pool.
+    '''
+
+    (minimum, maximum, mean, stddev,
+     valid) = get_statistics(file_name, band_type)
+
+    # Drop the filename extention so we can replace it with 'stats'
+    base = os.path.splitext(file_name)[0]
+    base_name = '.'.join([base, 'stats'])
+
+    # Figure out the full path filename
+    stats_output_file = os.path.join(stats_output_path, base_name)
+
+    # Buffer the stats
+    data_io = StringIO()
+    data_io.write("FILENAME=%s\n" % file_name)
+    data_io.write("MINIMUM=%f\n" % minimum)
+    data_io.write("MAXIMUM=%f\n" % maximum)
+    data_io.write("MEAN=%f\n" % mean)
+    data_io.write("STDDEV=%f\n" % stddev)
+    data_io.write("VALID=%s\n" % valid)
+
+    # Create the stats file
+    with open(stats_output_file, 'w+') as stat_fd:
+        stat_fd.write(data_io.getvalue())
+# END - generate_file_statistics
+
+
+# ============================================================================
+def generate_statistics(work_directory, files_to_search_for, workers=None):
     '''
     Description:
       Create the stats output directory and each output stats file for each
       file specified.
 
+    Parameters:
+      workers - The number of processes to use for generating the
+                statistics.  Defaults to settings.STATISTICS_WORKERS, or the
+                number of available cores if that is not set.  A value of 1
+                processes the files sequentially in this process.
+
     Notes:
       The stats directory is created here because we only want it in the
       product if we need statistics.
@@ -95,6 +220,14 @@ def generate_statistics(work_directory, files_to_search_for):
 
     logger = EspaLogging.get_logger(settings.PROCESSING_LOGGER)
 
+    if workers is None:
+        workers = settings.STATISTICS_WORKERS
+    if workers is None:
+        try:
+            workers = multiprocessing.cpu_count()
+        except NotImplementedError:
+            workers = 1
+
     # Change to the working directory
     current_directory = os.getcwd()
     os.chdir(work_directory)
@@ -118,36 +251,39 @@ def generate_statistics(work_directory, files_to_search_for):
                 for search in files_to_search_for[band_type]:
                     file_names[band_type].extend(glob.glob(search))
 
-            # Generate the requested statistics for each tile
+            jobs = list()
             for band_type in file_names:
                 for file_name in file_names[band_type]:
+                    jobs.append((stats_output_path, band_type, file_name))
 
-                    logger.info("Generating statistics for: %s" % file_name)
-
-                    (minimum, maximum, mean, stddev,
-                     valid) = get_statistics(file_name, band_type)
-
-                    # Drop the filename extention so we can replace it with
-                    # 'stats'
-                    base = os.path.splitext(file_name)[0]
-                    base_name = '.'.join([base, 'stats'])
-
-                    # Figure out the full path filename
-                    stats_output_file = os.path.join(stats_output_path,
-                                                     base_name)
+            workers = max(1, min(workers, len(jobs)))
 
-                    # Buffer the stats
-                    data_io = StringIO()
-                    data_io.write("FILENAME=%s\n" % file_name)
-                    data_io.write("MINIMUM=%f\n" % minimum)
-                    data_io.write("MAXIMUM=%f\n" % maximum)
-                    data_io.write("MEAN=%f\n" % mean)
-                    data_io.write("STDDEV=%f\n" % stddev)
-                    data_io.write("VALID=%s\n" % valid)
-
-                    # Create the stats file
-                    with open(stats_output_file, 'w+') as stat_fd:
-                        stat_fd.write(data_io.getvalue())
+            # Generate the requested statistics for each tile
+            if workers == 1:
+                for job in jobs:
+                    logger.info("Generating statistics for: %s" % job[2])
+                    generate_file_statistics(*job)
+            else:
+                logger.info("Generating statistics using %d processes"
+                            % workers)
+
+                pool = multiprocessing.Pool(processes=workers)
+                try:
+                    results = list()
+                    for job in jobs:
+                        logger.info("Generating statistics for: %s"
+                                    % job[2])
+                        results.append(
+                            pool.apply_async(generate_file_statistics, job))
+
+                    pool.close()
+
+                    # Retrieve each result so any failure is raised here
+                    for result in results:
+                        result.get()
+                finally:
+                    pool.terminate()
+                    pool.join()
             # END - for tile
         except Exception as e:
             raise ee.ESPAException(ee.ErrorCodes.statistics,
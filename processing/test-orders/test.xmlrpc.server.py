@@ -65,6 +65,13 @@ def get_configuration(config_item):
     return ''
 
 
+# ============================================================================
+# Called from the crons
+def get_configurations(config_items):
+
+    return dict((item, get_configuration(item)) for item in config_items)
+
+
 # ============================================================================
 # Called from the crons
 def get_scenes_to_process(limit, user, priority, product_types):
@@ -278,6 +285,7 @@ if __name__ == '__main__':
     # server.register_function(server.shutdown)
 
     server.register_function(get_configuration, 'get_configuration')
+    server.register_function(get_configurations, 'get_configurations')
     server.register_function(get_scenes_to_process, 'get_scenes_to_process')
     server.register_function(queue_products, 'queue_products')
     server.register_function(update_status, 'update_status')
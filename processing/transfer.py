@@ -15,7 +15,7 @@ import shutil
 import ftplib
 import urllib2
 import requests
-from contextlib import closing
+from multiprocessing.pool import ThreadPool
 
 # imports from espa_common
 from logger_factory import EspaLogging
@@ -321,52 +321,18 @@ def http_transfer_file(download_url, destination_file):
     Description:
       Using http transfer a file from a source location to a destination
       file on the localhost.
+
+    Notes:
+      The file is streamed to disk in settings.TRANSFER_BLOCK_SIZE chunks and
+      the size retrieved is verified against the Content-Length.  When a
+      retry is required, the transfer is resumed from the end of the partial
+      file using an HTTP Range request.
     '''
 
     logger = EspaLogging.get_logger(settings.PROCESSING_LOGGER)
 
     logger.info(download_url)
 
-# First way
-#    file_size = 0
-#    retrieved_bytes = 0
-#    with closing(requests.get(download_url, stream=True)) as req:
-#        if not req.ok:
-#            raise Exception("Transfer Failed - HTTP - Reason(%s)"
-#                            % req.reason)
-#
-#        file_size = int(req.headers['content-length'])
-#
-#        with open(destination_file, 'wb') as local_fd:
-#            for data_chunk in req.iter_content(settings.TRANSFER_BLOCK_SIZE):
-#                local_fd.write(data_chunk)
-#                retrieved_bytes += len(data_chunk)
-#
-#    if retrieved_bytes != file_size:
-#        raise Exception("Transfer Failed - HTTP - Retrieved %d"
-#                        " out of %d bytes" % (retrieved_bytes, file_size))
-#    else:
-#        logger.info("Transfer Complete - HTTP")
-
-# Second way
-#    req = None
-#    try:
-#        req = requests.get(download_url)
-#
-#        if not req.ok:
-#            logger.error("Transfer Failed - HTTP")
-#            req.raise_for_status()
-#
-#        with open(destination_file, 'wb') as local_fd:
-#            local_fd.write(req.content)
-#    except:
-#        logger.error("Transfer Failed - HTTP")
-#        raise
-#    finally:
-#        if req is not None:
-#            req.close()
-
-# Third way
     session = requests.Session()
 
     session.mount('http://', requests.adapters.HTTPAdapter(max_retries=3))
@@ -377,14 +343,56 @@ def http_transfer_file(download_url, destination_file):
     while not done:
         req = None
         try:
-            req = session.get(url=download_url, timeout=300.0)
+            # Resume from the partial file when retrying
+            retrieved_bytes = 0
+            if retry_attempt > 0 and os.path.exists(destination_file):
+                retrieved_bytes = os.path.getsize(destination_file)
+
+            headers = dict()
+            if retrieved_bytes > 0:
+                headers['Range'] = 'bytes=%d-' % retrieved_bytes
+                logger.info("Resuming transfer at byte %d" % retrieved_bytes)
+
+            req = session.get(url=download_url, timeout=300.0, stream=True,
+                              headers=headers)
+
+            if (req.status_code
+                    == requests.codes.requested_range_not_satisfiable):
+                # The partial file is not usable so start over
+                os.unlink(destination_file)
+                raise Exception("Transfer Failed - HTTP - Unable to resume"
+                                " at byte %d" % retrieved_bytes)
 
             if not req.ok:
                 logger.error("Transfer Failed - HTTP")
                 req.raise_for_status()
 
-            with open(destination_file, 'wb') as local_fd:
-                local_fd.write(req.content)
+            mode = 'wb'
+            if req.status_code == requests.codes.partial_content:
+                mode = 'ab'
+            else:
+                # Range requests are not supported, so we get everything
+                retrieved_bytes = 0
+
+            # The length can only be verified when the content is not being
+            # decoded on the way to us
+            expected_bytes = None
+            if ('content-length' in req.headers
+                    and 'content-encoding' not in req.headers):
+                expected_bytes = (retrieved_bytes
+                                  + int(req.headers['content-length']))
+
+            with open(destination_file, mode) as local_fd:
+                for data_chunk in \
+                        req.iter_content(settings.TRANSFER_BLOCK_SIZE):
+                    local_fd.write(data_chunk)
+                    retrieved_bytes += len(data_chunk)
+
+            if (expected_bytes is not None
+                    and retrieved_bytes != expected_bytes):
+                raise Exception("Transfer Failed - HTTP - Retrieved %d"
+                                " out of %d bytes"
+                                % (retrieved_bytes, expected_bytes))
 
             done = True
 
@@ -406,15 +414,316 @@ def http_transfer_file(download_url, destination_file):
 
 
 # ============================================================================
-def download_file_url(download_url, destination_file):
+class StreamWriteError(Exception):
+    '''
+    Description:
+      Raised when the consumer of a streamed transfer fails to accept data.
+    '''
+    pass
+# END - StreamWriteError
+
+
+# ============================================================================
+def http_stream_file(download_url, output_fd):
+    '''
+    Description:
+      Using http transfer a file from a source location and write it to an
+      already open file object as it arrives, without writing the file to
+      disk.
+
+    Notes:
+      When a retry is required the transfer is resumed after the bytes
+      already written, using an HTTP Range request when the server supports
+      it and discarding the leading bytes when it does not.
+    '''
+
+    logger = EspaLogging.get_logger(settings.PROCESSING_LOGGER)
+
+    download_url = urllib2.unquote(download_url)
+
+    logger.info(download_url)
+
+    session = requests.Session()
+
+    session.mount('http://', requests.adapters.HTTPAdapter(max_retries=3))
+    session.mount('https://', requests.adapters.HTTPAdapter(max_retries=3))
+
+    written_bytes = 0
+
+    retry_attempt = 0
+    done = False
+    while not done:
+        req = None
+        try:
+            headers = dict()
+            if written_bytes > 0:
+                headers['Range'] = 'bytes=%d-' % written_bytes
+                logger.info("Resuming transfer at byte %d" % written_bytes)
+
+            req = session.get(url=download_url, timeout=300.0, stream=True,
+                              headers=headers)
+
+            if not req.ok:
+                logger.error("Transfer Failed - HTTP")
+                req.raise_for_status()
+
+            # Number of leading bytes we already have and must discard
+            skip_bytes = 0
+            if req.status_code != requests.codes.partial_content:
+                skip_bytes = written_bytes
+
+            expected_bytes = None
+            if ('content-length' in req.headers
+                    and 'content-encoding' not in req.headers):
+                expected_bytes = (written_bytes - skip_bytes
+                                  + int(req.headers['content-length']))
+
+            for data_chunk in req.iter_content(settings.TRANSFER_BLOCK_SIZE):
+                if skip_bytes > 0:
+                    skipped = min(skip_bytes, len(data_chunk))
+                    data_chunk = data_chunk[skipped:]
+                    skip_bytes -= skipped
+                if data_chunk:
+                    try:
+                        output_fd.write(data_chunk)
+                    except IOError as e:
+                        raise StreamWriteError("Transfer Failed - HTTP -"
+                                               " Unable to write the"
+                                               " stream: %s" % str(e))
+                    written_bytes += len(data_chunk)
+
+            if (expected_bytes is not None
+                    and written_bytes != expected_bytes):
+                raise Exception("Transfer Failed - HTTP - Retrieved %d"
+                                " out of %d bytes"
+                                % (written_bytes, expected_bytes))
+
+            done = True
+
+        except StreamWriteError:
+            # The consumer of the stream failed, retrying will not help
+            raise
+
+        except:
+            logger.exception("Transfer Issue - HTTP")
+            if retry_attempt > 3:
+                raise Exception("Transfer Failed - HTTP"
+                                " - exceeded retry limit")
+            retry_attempt += 1
+            sleep(int(1.5 * retry_attempt))
+
+        finally:
+            if req is not None:
+                req.close()
+
+    logger.info("Transfer Complete - HTTP - Streamed")
+# END - http_stream_file
+
+
+# ============================================================================
+class RangeNotSupported(Exception):
+    '''
+    Description:
+      Raised when a server does not honor HTTP Range requests.
+    '''
+    pass
+# END - RangeNotSupported
+
+
+# ============================================================================
+def http_transfer_segment(download_url, destination_file, start, end):
+    '''
+    Description:
+      Using http transfer the inclusive byte range [start, end] of a file into
+      the same range of the preallocated destination file.
+    '''
+
+    logger = EspaLogging.get_logger(settings.PROCESSING_LOGGER)
+
+    session = requests.Session()
+
+    session.mount('http://', requests.adapters.HTTPAdapter(max_retries=3))
+    session.mount('https://', requests.adapters.HTTPAdapter(max_retries=3))
+
+    # Where to continue from if a retry is required
+    position = start
+
+    retry_attempt = 0
+    done = False
+    while not done:
+        req = None
+        try:
+            # The bytes must arrive exactly as stored for the ranges to
+            # line up, so ask for them without any content encoding
+            headers = {'Range': 'bytes=%d-%d' % (position, end),
+                       'Accept-Encoding': 'identity'}
+
+            req = session.get(url=download_url, timeout=300.0, stream=True,
+                              headers=headers)
+
+            if not req.ok:
+                logger.error("Transfer Failed - HTTP - Segment")
+                req.raise_for_status()
+
+            if req.status_code != requests.codes.partial_content:
+                raise RangeNotSupported("Transfer Failed - HTTP - Range"
+                                        " requests are not supported")
+
+            # Decoded content can't be placed by byte position
+            if 'content-encoding' in req.headers:
+                raise RangeNotSupported("Transfer Failed - HTTP - Range"
+                                        " response is encoded [%s]"
+                                        % req.headers['content-encoding'])
+
+            # Content-Range looks like 'bytes 100-199/1000'
+            content_range = req.headers.get('content-range', '')
+            if not content_range.startswith('bytes %d-' % position):
+                raise RangeNotSupported("Transfer Failed - HTTP - Range"
+                                        " response [%s] does not start at"
+                                        " byte %d" % (content_range, position))
+
+            with open(destination_file, 'r+b') as local_fd:
+                local_fd.seek(position)
+                for data_chunk in \
+                        req.iter_content(settings.TRANSFER_BLOCK_SIZE):
+                    # Never write past the end of the segment
+                    data_chunk = data_chunk[:end + 1 - position]
+                    local_fd.write(data_chunk)
+                    position += len(data_chunk)
+
+            if position != end + 1:
+                raise Exception("Transfer Failed - HTTP - Segment retrieved"
+                                " %d out of %d bytes"
+                                % (position - start, end + 1 - start))
+
+            done = True
+
+        except RangeNotSupported:
+            raise
+
+        except:
+            logger.exception("Transfer Issue - HTTP - Segment")
+            if retry_attempt > 3:
+                raise Exception("Transfer Failed - HTTP - Segment"
+                                " - exceeded retry limit")
+            retry_attempt += 1
+            sleep(int(1.5 * retry_attempt))
+
+        finally:
+            if req is not None:
+                req.close()
+
+    session.close()
+# END - http_transfer_segment
+
+
+# ============================================================================
+def http_segmented_transfer_file(download_url, destination_file,
+                                 segments=settings.TRANSFER_SEGMENTS):
+    '''
+    Description:
+      Using http transfer a file from a source location to a destination
+      file on the localhost, using multiple concurrent Range requests which
+      are written directly into their place in a preallocated file.
+
+    Notes:
+      Falls back to http_transfer_file when the server does not report a
+      length, does not support ranges, or the file is too small to benefit.
+    '''
+
+    logger = EspaLogging.get_logger(settings.PROCESSING_LOGGER)
+
+    logger.info(download_url)
+
+    file_size = None
+    accepts_ranges = False
+    req = None
+    try:
+        req = requests.head(download_url, timeout=300.0,
+                            allow_redirects=True)
+        if req.ok:
+            if 'content-length' in req.headers:
+                file_size = int(req.headers['content-length'])
+            accepts_ranges = \
+                (req.headers.get('accept-ranges', '').lower() == 'bytes')
+            # Use the final location for all of the segments
+            download_url = req.url
+    except Exception:
+        logger.exception("Unable to determine segmented transfer support")
+    finally:
+        if req is not None:
+            req.close()
+
+    if (segments < 2 or not accepts_ranges or file_size is None
+            or file_size < settings.TRANSFER_SEGMENT_MIN_SIZE):
+        logger.info("Using a single stream for the transfer")
+        http_transfer_file(download_url, destination_file)
+        return
+
+    # Determine the inclusive byte ranges for each segment
+    segment_size = (file_size + segments - 1) // segments
+    ranges = [(start, min(start + segment_size, file_size) - 1)
+              for start in xrange(0, file_size, segment_size)]
+
+    logger.info("Transferring %d bytes using %d segments"
+                % (file_size, len(ranges)))
+
+    # Preallocate the destination file
+    with open(destination_file, 'wb') as local_fd:
+        local_fd.truncate(file_size)
+
+    ranges_supported = True
+    pool = ThreadPool(processes=len(ranges))
+    try:
+        results = [pool.apply_async(http_transfer_segment,
+                                    (download_url, destination_file,
+                                     start, end))
+                   for (start, end) in ranges]
+
+        pool.close()
+
+        # Retrieve each result so any failure is raised here
+        for result in results:
+            result.get()
+
+    except RangeNotSupported:
+        ranges_supported = False
+
+    finally:
+        pool.terminate()
+        pool.join()
+
+    if not ranges_supported:
+        logger.warning("Range requests were not honored, falling back to"
+                       " a single stream for the transfer")
+        http_transfer_file(download_url, destination_file)
+        return
+
+    if os.path.getsize(destination_file) != file_size:
+        raise Exception("Transfer Failed - HTTP - Segmented file size does"
+                        " not match %d bytes" % file_size)
+
+    logger.info("Transfer Complete - HTTP - Segmented")
+# END - http_segmented_transfer_file
+
+
+# ============================================================================
+def download_file_url(download_url, destination_file, segments=1):
     '''
     Description:
         Using a URL download the specified file to the destination.
+
+    Parameters:
+        segments - The number of concurrent segments to use for http
+                   transfers.  A value of 1 uses a single stream.
     '''
 
     download_url = urllib2.unquote(download_url)
 
-    if download_url.startswith('http'):
+    if download_url.startswith('http') and segments > 1:
+        http_segmented_transfer_file(download_url, destination_file,
+                                     segments=segments)
+    elif download_url.startswith('http'):
         http_transfer_file(download_url, destination_file)
     elif download_url.startswith('file://'):
         source_file = download_url.replace('file://', '')
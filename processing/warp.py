@@ -17,7 +17,10 @@ History:
 import os
 import sys
 import glob
-import copy
+import threading
+import collections
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 from cStringIO import StringIO
 from argparse import ArgumentParser
 from osgeo import gdal, osr
@@ -48,6 +51,26 @@ valid_ns = ['north', 'south']
 # First entry in the datums is used as the default, it should always be set to
 # WGS84
 valid_datums = [settings.WGS84, settings.NAD27, settings.NAD83]
+# 'gdalwarp' executes the gdalwarp application for each band
+# 'gdal_api' warps in-process through the GDAL python bindings
+valid_warp_engines = ['gdalwarp', 'gdal_api']
+
+# Process-wide caches, so every scene after the first using the same
+# projection parameters reuses what was built for the first scene.  Each
+# holds at most settings.PROJECTION_CACHE_SIZE of the most recently used
+# entries.
+projection_cache_lock = threading.RLock()
+proj4_cache = collections.OrderedDict()
+srs_cache = collections.OrderedDict()
+transform_cache = collections.OrderedDict()
+minbox_cache = collections.OrderedDict()
+
+# The parameters which determine the target proj.4 string
+proj4_parameter_names = ['target_projection', 'central_meridian',
+                         'false_easting', 'false_northing',
+                         'std_parallel_1', 'std_parallel_2', 'origin_lat',
+                         'datum', 'utm_zone', 'utm_north_south',
+                         'latitude_true_scale', 'longitude_pole']
 
 
 # ============================================================================
@@ -97,6 +120,97 @@ def validate_parameters(parms, scene):
 # END - validate_parameters
 
 
+# ============================================================================
+def normalize_proj4(proj4):
+    '''
+    Description:
+      Normalize the whitespace in a proj.4 string so it can be used as a
+      cache key.
+    '''
+
+    return ' '.join(str(proj4).split())
+# END - normalize_proj4
+
+
+# ============================================================================
+def get_cached(cache, key):
+    '''
+    Description:
+      Returns the cached value for the key, or None, marking it as the most
+      recently used.
+    '''
+
+    with projection_cache_lock:
+        value = cache.pop(key, None)
+        if value is not None:
+            cache[key] = value
+
+    return value
+# END - get_cached
+
+
+# ============================================================================
+def set_cached(cache, key, value):
+    '''
+    Description:
+      Caches the value for the key, discarding the least recently used
+      entries beyond settings.PROJECTION_CACHE_SIZE.
+    '''
+
+    with projection_cache_lock:
+        cache[key] = value
+        while len(cache) > settings.PROJECTION_CACHE_SIZE:
+            cache.popitem(last=False)
+# END - set_cached
+
+
+# ============================================================================
+def get_spatial_reference(proj4):
+    '''
+    Description:
+      Returns the cached osr.SpatialReference for the proj.4 string, creating
+      it on first use.
+
+    Notes:
+      The returned object is shared and must not be modified.
+    '''
+
+    key = normalize_proj4(proj4)
+
+    with projection_cache_lock:
+        srs = get_cached(srs_cache, key)
+        if srs is None:
+            srs = osr.SpatialReference()
+            if srs.ImportFromProj4(key) != 0:
+                raise ValueError("Invalid proj.4 projection [%s]" % proj4)
+            set_cached(srs_cache, key, srs)
+
+    return srs
+# END - get_spatial_reference
+
+
+# ============================================================================
+def get_coordinate_transformation(source_proj4, target_proj4):
+    '''
+    Description:
+      Returns the cached osr.CoordinateTransformation between the proj.4
+      strings, creating it on first use.
+    '''
+
+    key = (normalize_proj4(source_proj4), normalize_proj4(target_proj4))
+
+    with projection_cache_lock:
+        transform = get_cached(transform_cache, key)
+        if transform is None:
+            transform = \
+                osr.CoordinateTransformation(get_spatial_reference(key[0]),
+                                             get_spatial_reference(key[1]))
+            set_cached(transform_cache, key, transform)
+
+    return transform
+# END - get_coordinate_transformation
+
+
 # ============================================================================
 def build_sinu_proj4_string(central_meridian, false_easting, false_northing):
     '''
@@ -209,6 +323,12 @@ def convert_target_projection_to_proj4(parms):
       depending on the projection, the correct proj4 parameters are returned.
     '''
 
+    # Previously converted parameters are returned from the cache
+    key = tuple([parms.get(name) for name in proj4_parameter_names])
+    projection = get_cached(proj4_cache, key)
+    if projection is not None:
+        return projection
+
     projection = None
     target_projection = None
 
@@ -245,10 +365,58 @@ def convert_target_projection_to_proj4(parms):
     elif target_projection == "lonlat":
         projection = settings.GEOGRAPHIC_PROJ4_STRING
 
-    return str(projection)
+    projection = str(projection)
+
+    set_cached(proj4_cache, key, projection)
+
+    return projection
 # END - convert_target_projection_to_proj4
 
 
+# ============================================================================
+def minbox_edge_extents(transform, ul_lon, ul_lat, lr_lon, lr_lat,
+                        lon_fractions, lat_fractions, extents):
+    '''
+    Description:
+      Transform the points along the edges of the geographic box at the
+      specified fractions of each side, with a single call to the
+      transformation, and expand the provided extents to contain them.
+
+    Parameters:
+      lon_fractions = Fractions (0.0 - 1.0) along the top and bottom
+      lat_fractions = Fractions (0.0 - 1.0) along the left and right
+      extents       = The current (min_x, min_y, max_x, max_y)
+
+    Returns:
+        (min_x, min_y, max_x, max_y) in map coordinates
+    '''
+
+    longitudes = ul_lon + lon_fractions * (lr_lon - ul_lon)
+    latitudes = lr_lat + lat_fractions * (ul_lat - lr_lat)
+
+    # Top, bottom, left, and right sides
+    lons = np.concatenate((longitudes, longitudes,
+                           np.repeat(ul_lon, latitudes.size),
+                           np.repeat(lr_lon, latitudes.size)))
+    lats = np.concatenate((np.repeat(ul_lat, longitudes.size),
+                           np.repeat(lr_lat, longitudes.size),
+                           latitudes, latitudes))
+
+    if lons.size == 0:
+        return extents
+
+    points = np.array(transform.TransformPoints(
+        np.column_stack((lons, lats)).tolist()))
+
+    (min_x, min_y, max_x, max_y) = extents
+
+    return (min(min_x, float(points[:, 0].min())),
+            min(min_y, float(points[:, 1].min())),
+            max(max_x, float(points[:, 0].max())),
+            max(max_y, float(points[:, 1].max())))
+# END - minbox_edge_extents
+
+
 # ============================================================================
 def projection_minbox(ul_lon, ul_lat, lr_lon, lr_lat,
                       target_proj4, pixel_size, pixel_size_units):
@@ -264,8 +432,8 @@ def projection_minbox(ul_lon, ul_lat, lr_lon, lr_lat,
       lr_lon       = Lower Right longitude in decimal degrees
       lr_lat       = Lower Right latitude in decimal degrees
       target_proj4 = The user supplied target proj4 string
-      pixel_size   = The target pixel size in meters used to step along the
-                     projected area boundary
+      pixel_size   = The target pixel size used as the finest step along
+                     the projected area boundary
       pixel_size_units = The units the pixel size is in 'dd' or 'meters'
 
     Returns:
@@ -282,16 +450,18 @@ def projection_minbox(ul_lon, ul_lat, lr_lon, lr_lat,
     logger.info("Using source projection [%s]" % source_proj4)
     logger.info("Using target projection [%s]" % target_proj4)
 
-    # Create and initialize the source SRS
-    source_srs = osr.SpatialReference()
-    source_srs.ImportFromProj4(source_proj4)
+    # Use the previously determined extents if we have them
+    key = (ul_lon, ul_lat, lr_lon, lr_lat, normalize_proj4(target_proj4),
+           pixel_size, pixel_size_units)
+    extents = get_cached(minbox_cache, key)
+    if extents is not None:
+        logger.info('Using previously determined map coordinates')
+        logger.info(','.join(['min_x', 'min_y', 'max_x', 'max_y']))
+        logger.info(','.join([str(value) for value in extents]))
+        return extents
 
-    # Create and initialize the target SRS
-    target_srs = osr.SpatialReference()
-    target_srs.ImportFromProj4(target_proj4)
-
-    # Create the transformation object
-    transform = osr.CoordinateTransformation(source_srs, target_srs)
+    # Get the transformation object
+    transform = get_coordinate_transformation(source_proj4, target_proj4)
 
     # Determine the step in decimal degrees
     step = pixel_size
@@ -299,9 +469,17 @@ def projection_minbox(ul_lon, ul_lat, lr_lon, lr_lat,
         # Convert it to decimal degrees
         step = settings.DEG_FOR_1_METER * pixel_size
 
-    # Determine the lat and lon values to iterate over
-    longitudes = np.arange(ul_lon, lr_lon, step, np.float)
-    latitudes = np.arange(lr_lat, ul_lat, step, np.float)
+    # Stop densifying once the extents change by less than this many meters
+    tolerance = (step / settings.DEG_FOR_1_METER) * settings.MINBOX_TOLERANCE
+
+    # Never step along the boundary more finely than the pixel size
+    lon_span = lr_lon - ul_lon
+    lat_span = ul_lat - lr_lat
+    max_lon_segments = max(1, int(np.ceil(abs(lon_span) / step)))
+    max_lat_segments = max(1, int(np.ceil(abs(lat_span) / step)))
+
+    lon_segments = min(settings.MINBOX_INITIAL_SEGMENTS, max_lon_segments)
+    lat_segments = min(settings.MINBOX_INITIAL_SEGMENTS, max_lat_segments)
 
     # Initialization using the two corners
     (ul_x, ul_y, z) = transform.TransformPoint(ul_lon, ul_lat)
@@ -316,53 +494,66 @@ def projection_minbox(ul_lon, ul_lat, lr_lon, lr_lat,
     logger.info(','.join(['min_x', 'min_y', 'max_x', 'max_y']))
     logger.info(','.join([str(min_x), str(min_y), str(max_x), str(max_y)]))
 
-    # Walk across the top and bottom of the geographic coordinates
-    for lon in longitudes:
-        # Upper side
-        (ux, uy, z) = transform.TransformPoint(lon, ul_lat)
+    # Walk all four sides of the geographic coordinates, starting with an
+    # evenly spaced set of points including the corners
+    (min_x, min_y, max_x, max_y) = \
+        minbox_edge_extents(transform, ul_lon, ul_lat, lr_lon, lr_lat,
+                            np.linspace(0.0, 1.0, lon_segments + 1),
+                            np.linspace(0.0, 1.0, lat_segments + 1),
+                            (min_x, min_y, max_x, max_y))
 
-        # Lower side
-        (lx, ly, z) = transform.TransformPoint(lon, lr_lat)
+    # Adaptively densify by adding the midpoints of the current segments
+    # until the extents settle or we reach the pixel size
+    while (lon_segments < max_lon_segments
+           or lat_segments < max_lat_segments):
 
-        min_x = min(ux, lx, min_x)
-        max_x = max(ux, lx, max_x)
-        min_y = min(uy, ly, min_y)
-        max_y = max(uy, ly, max_y)
+        lon_fractions = np.empty(0)
+        if lon_segments < max_lon_segments:
+            lon_fractions = ((np.arange(lon_segments) + 0.5)
+                             / float(lon_segments))
+            lon_segments *= 2
 
-    # Walk along the left and right of the geographic coordinates
-    for lat in latitudes:
-        # Left side
-        (lx, ly, z) = transform.TransformPoint(ul_lon, lat)
+        lat_fractions = np.empty(0)
+        if lat_segments < max_lat_segments:
+            lat_fractions = ((np.arange(lat_segments) + 0.5)
+                             / float(lat_segments))
+            lat_segments *= 2
 
-        # Right side
-        (rx, ry, z) = transform.TransformPoint(lr_lon, lat)
+        extents = minbox_edge_extents(transform,
+                                      ul_lon, ul_lat, lr_lon, lr_lat,
+                                      lon_fractions, lat_fractions,
+                                      (min_x, min_y, max_x, max_y))
 
-        min_x = min(rx, lx, min_x)
-        max_x = max(rx, lx, max_x)
-        min_y = min(ry, ly, min_y)
-        max_y = max(ry, ly, max_y)
+        change = max(abs(new - old) for (new, old)
+                     in zip(extents, (min_x, min_y, max_x, max_y)))
 
-    del(transform)
-    del(source_srs)
-    del(target_srs)
+        (min_x, min_y, max_x, max_y) = extents
+
+        if change <= tolerance:
+            break
+
+    logger.info('Minbox determined using %d longitude and %d latitude'
+                ' segments' % (lon_segments, lat_segments))
 
     logger.info('Map coordinates after minbox determination')
     logger.info(','.join(['min_x', 'min_y', 'max_x', 'max_y']))
     logger.info(','.join([str(min_x), str(min_y), str(max_x), str(max_y)]))
 
+    set_cached(minbox_cache, key, (min_x, min_y, max_x, max_y))
+
     return (min_x, min_y, max_x, max_y)
 # END - projection_minbox
 
 
 # ============================================================================
-def build_image_extents_string(parms, target_proj4):
+def determine_image_extents(parms, target_proj4):
     '''
     Description:
-      Build the gdal_warp image extents string from the determined min and max
-      values.
+      Determine the image extents in the target projection from the min and
+      max values.
 
     Returns:
-        str('min_x min_y max_x max_y')
+        (min_x, min_y, max_x, max_y) or None
     '''
 
     # Nothing to do if we are not sub-setting the data
@@ -371,7 +562,7 @@ def build_image_extents_string(parms, target_proj4):
 
     target_projection = parms['target_projection']
 
-    # Get the image extents string
+    # Get the image extents
     if (parms['image_extents_units'] == 'dd'
             and (target_projection is None or target_projection != 'lonlat')):
 
@@ -385,12 +576,37 @@ def build_image_extents_string(parms, target_proj4):
         (min_x, min_y, max_x, max_y) = (parms['minx'], parms['miny'],
                                         parms['maxx'], parms['maxy'])
 
-    return ' '.join([str(min_x), str(min_y), str(max_x), str(max_y)])
+    return (min_x, min_y, max_x, max_y)
+# END - determine_image_extents
+
+
+# ============================================================================
+def build_image_extents_string(parms, target_proj4):
+    '''
+    Description:
+      Build the gdal_warp image extents string from the determined min and max
+      values.
+
+    Returns:
+        str('min_x min_y max_x max_y')
+    '''
+
+    image_extents = determine_image_extents(parms, target_proj4)
+
+    # Nothing to do if we are not sub-setting the data
+    if image_extents is None:
+        return None
+
+    return ' '.join([str(value) for value in image_extents])
 # END - build_image_extents_string
 
 
 # ============================================================================
-def build_base_warp_command(parms, output_format='envi', original_proj4=None):
+def determine_target_proj4(parms, original_proj4=None):
+    '''
+    Description:
+      Determine the proj.4 string for the target projection.
+    '''
 
     # Get the proj4 projection string
     if parms['projection'] is not None:
@@ -403,9 +619,19 @@ def build_base_warp_command(parms, output_format='envi', original_proj4=None):
         # Default to the provided original proj.4 string
         target_proj4 = original_proj4
 
+    return target_proj4
+# END - determine_target_proj4
+
+
+# ============================================================================
+def build_base_warp_command(parms, output_format='envi', original_proj4=None,
+                            warp_memory=settings.WARP_MEMORY_BUDGET):
+
+    target_proj4 = determine_target_proj4(parms, original_proj4)
+
     image_extents = build_image_extents_string(parms, target_proj4)
 
-    cmd = ['gdalwarp', '-wm', '2048', '-multi', '-of', output_format]
+    cmd = ['gdalwarp', '-wm', str(warp_memory), '-multi', '-of', output_format]
 
     # Subset the image using the specified extents
     if image_extents is not None:
@@ -421,6 +647,41 @@ def build_base_warp_command(parms, output_format='envi', original_proj4=None):
 # END - build_base_warp_command
 
 
+# ============================================================================
+def build_base_warp_options(parms, output_format='envi', original_proj4=None,
+                            warp_memory=settings.WARP_MEMORY_BUDGET):
+    '''
+    Description:
+      Build the gdal.WarpOptions keyword arguments shared by every band of
+      the scene.  This is the in-process equivalent of
+      build_base_warp_command.
+
+    Notes:
+      The target projection is parsed once, from the cache, and handed to
+      GDAL as WKT so it is not parsed again for each band.
+    '''
+
+    target_proj4 = determine_target_proj4(parms, original_proj4)
+
+    options = {
+        'format': output_format,
+        'warpMemoryLimit': warp_memory,
+        'multithread': True
+    }
+
+    # Subset the image using the specified extents
+    image_extents = determine_image_extents(parms, target_proj4)
+    if image_extents is not None:
+        options['outputBounds'] = image_extents
+
+    # Reproject the data
+    if target_proj4 is not None:
+        options['dstSRS'] = get_spatial_reference(target_proj4).ExportToWkt()
+
+    return options
+# END - build_base_warp_options
+
+
 # ============================================================================
 def warp_image(source_file, output_file,
                base_warp_command=None,
@@ -434,41 +695,81 @@ def warp_image(source_file, output_file,
 
     logger = EspaLogging.get_logger(settings.PROCESSING_LOGGER)
 
-    try:
-        # Turn GDAL PAM off to prevent *.aux.xml files
-        os.environ['GDAL_PAM_ENABLED'] = 'NO'
+    # Turn GDAL PAM off to prevent *.aux.xml files
+    # It is set for the command only, so that multiple bands can be warped
+    # concurrently without modifying the shared process environment
+    cmd = ['GDAL_PAM_ENABLED=NO']
+    cmd.extend(base_warp_command)
 
-        cmd = copy.deepcopy(base_warp_command)
+    # Resample method to use
+    cmd.extend(['-r', resample_method])
 
-        # Resample method to use
-        cmd.extend(['-r', resample_method])
+    # Resize the pixels
+    if pixel_size is not None:
+        cmd.extend(['-tr', str(pixel_size), str(pixel_size)])
 
-        # Resize the pixels
-        if pixel_size is not None:
-            cmd.extend(['-tr', str(pixel_size), str(pixel_size)])
+    # Specify the fill/nodata value
+    if no_data_value is not None:
+        cmd.extend(['-srcnodata', no_data_value])
+        cmd.extend(['-dstnodata', no_data_value])
 
-        # Specify the fill/nodata value
-        if no_data_value is not None:
-            cmd.extend(['-srcnodata', no_data_value])
-            cmd.extend(['-dstnodata', no_data_value])
+    # Now add the filenames
+    cmd.extend([source_file, output_file])
 
-        # Now add the filenames
-        cmd.extend([source_file, output_file])
+    cmd = ' '.join(cmd)
+    logger.info("Warping %s with %s" % (source_file, cmd))
 
-        cmd = ' '.join(cmd)
-        logger.info("Warping %s with %s" % (source_file, cmd))
+    output = utilities.execute_cmd(cmd)
+    if len(output) > 0:
+        logger.info(output)
+# END - warp_image
 
-        output = utilities.execute_cmd(cmd)
-        if len(output) > 0:
-            logger.info(output)
 
-    except Exception:
-        raise
+# ============================================================================
+def warp_image_in_process(source_file, output_file,
+                          base_warp_options=None,
+                          resample_method='near',
+                          pixel_size=None,
+                          no_data_value=None):
+    '''
+    Description:
+      Warps the specified source file using the GDAL python bindings instead
+      of executing gdalwarp
 
-    finally:
-        # Remove the environment variable we set above
-        del os.environ['GDAL_PAM_ENABLED']
-# END - warp_image
+    Notes:
+      GDAL_PAM_ENABLED is expected to have been turned off by the caller.
+    '''
+
+    logger = EspaLogging.get_logger(settings.PROCESSING_LOGGER)
+
+    options = dict(base_warp_options)
+
+    # Resample method to use
+    options['resampleAlg'] = resample_method
+
+    # Resize the pixels
+    if pixel_size is not None:
+        options['xRes'] = pixel_size
+        options['yRes'] = pixel_size
+
+    # Specify the fill/nodata value
+    if no_data_value is not None:
+        options['srcNodata'] = no_data_value
+        options['dstNodata'] = no_data_value
+
+    logger.info("Warping %s in-process with resample method [%s]"
+                " and pixel size [%s]"
+                % (source_file, resample_method, str(pixel_size)))
+
+    ds = gdal.Warp(output_file, source_file,
+                   options=gdal.WarpOptions(**options))
+    if ds is None:
+        raise RuntimeError("GDAL failed to warp (%s): %s"
+                           % (source_file, gdal.GetLastErrorMsg()))
+
+    # Closing the dataset flushes the image and header to disk
+    del (ds)
+# END - warp_image_in_process
 
 
 # ============================================================================
@@ -805,14 +1106,140 @@ def get_original_projection(img_filename):
 
 
 # ============================================================================
-def warp_espa_data(parms, scene, xml_filename=None):
+def warp_band(img_filename, base_warp, resample_method, pixel_size,
+              engine='gdalwarp'):
+    '''
+    Description:
+      Warp the specified band image and replace the image and its ENVI header
+      with the warped versions.
+
+    Parameters:
+      base_warp - The base warp command for the 'gdalwarp' engine, or the
+                  base warp options for the 'gdal_api' engine.
+
+    Notes:
+      Only operates on the files of the band, so it is safe to call for
+      multiple bands concurrently.
+    '''
+
+    hdr_filename = img_filename.replace('.img', '.hdr')
+
+    # Open the image to read the no data value out since the internal
+    # ENVI driver for GDAL does not output it, even if it is known
+    ds = gdal.Open(img_filename)
+    if ds is None:
+        raise RuntimeError("GDAL failed to open (%s)" % img_filename)
+
+    ds_band = None
+    try:
+        ds_band = ds.GetRasterBand(1)
+    except Exception, e:
+        raise ee.ESPAException(ee.ErrorCodes.warping,
+                               str(e)), None, sys.exc_info()[2]
+
+    # Save the no data value since gdalwarp does not write it out when
+    # using the ENVI format
+    no_data_value = ds_band.GetNoDataValue()
+    if no_data_value is not None:
+        # TODO - We don't process any floating point data types.  Yet
+        # Convert to an integer then string
+        no_data_value = str(int(no_data_value))
+
+    # Force a freeing of the memory
+    del (ds_band)
+    del (ds)
+
+    tmp_img_filename = 'tmp-%s' % img_filename
+    tmp_hdr_filename = 'tmp-%s' % hdr_filename
+
+    if engine == 'gdal_api':
+        warp_image_in_process(img_filename, tmp_img_filename,
+                              base_warp_options=base_warp,
+                              resample_method=resample_method,
+                              pixel_size=pixel_size,
+                              no_data_value=no_data_value)
+    else:
+        warp_image(img_filename, tmp_img_filename,
+                   base_warp_command=base_warp,
+                   resample_method=resample_method,
+                   pixel_size=pixel_size,
+                   no_data_value=no_data_value)
+
+    ##########################################################################
+    ##########################################################################
+    # Get new everything for the re-projected band
+    ##########################################################################
+    ##########################################################################
+
+    # Update the tmp ENVI header with our own values for some fields
+    sb = StringIO()
+    with open(tmp_hdr_filename, 'r') as tmp_fd:
+        while True:
+            line = tmp_fd.readline()
+            if not line:
+                break
+            if (line.startswith('data ignore value')
+                    or line.startswith('description')):
+                pass
+            else:
+                sb.write(line)
+
+            if line.startswith('description'):
+                # This may be on multiple lines so read lines until
+                # we find the closing brace
+                if not line.strip().endswith('}'):
+                    while 1:
+                        next_line = tmp_fd.readline()
+                        if (not next_line
+                                or next_line.strip().endswith('}')):
+                            break
+                sb.write('description = {ESPA-generated file}\n')
+            elif (line.startswith('data type')
+                  and (no_data_value is not None)):
+                sb.write('data ignore value = %s\n' % no_data_value)
+    # END - with tmp_fd
+
+    # Do the actual replace here
+    with open(tmp_hdr_filename, 'w') as tmp_fd:
+        tmp_fd.write(sb.getvalue())
+
+    # Remove the original files, they are replaced in following code
+    if os.path.exists(img_filename):
+        os.unlink(img_filename)
+    if os.path.exists(hdr_filename):
+        os.unlink(hdr_filename)
+
+    # Rename the temps file back to the original name
+    os.rename(tmp_img_filename, img_filename)
+    os.rename(tmp_hdr_filename, hdr_filename)
+# END - warp_band
+
+
+# ============================================================================
+def warp_espa_data(parms, scene, xml_filename=None, workers=None,
+                   engine=None):
     '''
     Description:
       Warp each espa science product to the parameters specified in the parms
+
+    Parameters:
+      workers - The number of bands to warp concurrently.  Defaults to
+                settings.WARP_WORKERS, or the number of available cores if
+                that is not set.  The settings.WARP_MEMORY_BUDGET is divided
+                between the workers.
+      engine - One of valid_warp_engines.  Defaults to settings.WARP_ENGINE.
     '''
 
     logger = EspaLogging.get_logger(settings.PROCESSING_LOGGER)
 
+    if workers is None:
+        workers = settings.WARP_WORKERS
+    if workers is None:
+        try:
+            workers = multiprocessing.cpu_count()
+        except NotImplementedError:
+            workers = 1
+
     # Validate the parameters
     validate_parameters(parms, scene)
     logger.debug(parms)
@@ -831,6 +1258,16 @@ def warp_espa_data(parms, scene, xml_filename=None):
     if xml_filename is None or xml_filename == '':
         raise ee.ESPAException(ee.ErrorCodes.warping, "Missing XML Filename")
 
+    if engine is None:
+        engine = settings.WARP_ENGINE
+    if engine not in valid_warp_engines:
+        raise ee.ESPAException(ee.ErrorCodes.warping,
+                               "Invalid warp engine [%s]" % engine)
+    if engine == 'gdal_api' and not hasattr(gdal, 'Warp'):
+        raise ee.ESPAException(ee.ErrorCodes.warping,
+                               "The installed GDAL python bindings do not"
+                               " provide the Warp API")
+
     # Change to the working directory
     current_directory = os.getcwd()
     os.chdir(parms['work_directory'])
@@ -844,9 +1281,21 @@ def warp_espa_data(parms, scene, xml_filename=None):
         # Might need this for the base warp command image extents
         original_proj4 = get_original_projection(bands.band[0].get_file_name())
 
-        # Build the base warp command to use
-        base_warp_command = \
-            build_base_warp_command(parms, original_proj4=str(original_proj4))
+        # Split the warp memory between the bands being warped concurrently
+        workers = max(1, min(workers, len(bands.band)))
+        warp_memory = max(1, settings.WARP_MEMORY_BUDGET // workers)
+
+        # Build the base warp command or options to use
+        if engine == 'gdal_api':
+            base_warp = \
+                build_base_warp_options(parms,
+                                        original_proj4=str(original_proj4),
+                                        warp_memory=warp_memory)
+        else:
+            base_warp = \
+                build_base_warp_command(parms,
+                                        original_proj4=str(original_proj4),
+                                        warp_memory=warp_memory)
 
         # Determine the user specified resample method
         user_resample_method = 'near'  # default
@@ -854,9 +1303,9 @@ def warp_espa_data(parms, scene, xml_filename=None):
             user_resample_method = parms['resample_method']
 
         # Process through the bands in the XML file
+        jobs = list()
         for band in bands.band:
             img_filename = band.get_file_name()
-            hdr_filename = img_filename.replace('.img', '.hdr')
             logger.info("Processing %s" % img_filename)
 
             # Reset the resample method to the user specified value
@@ -889,88 +1338,44 @@ def warp_espa_data(parms, scene, xml_filename=None):
                 else:
                     pixel_size = float(band.pixel_size.x)
 
-            # Open the image to read the no data value out since the internal
-            # ENVI driver for GDAL does not output it, even if it is known
-            ds = gdal.Open(img_filename)
-            if ds is None:
-                raise RuntimeError("GDAL failed to open (%s)" % img_filename)
+            jobs.append((img_filename, base_warp,
+                         resample_method, pixel_size, engine))
+        # END for each band in the XML file
 
-            ds_band = None
-            try:
-                ds_band = ds.GetRasterBand(1)
-            except Exception, e:
-                raise ee.ESPAException(ee.ErrorCodes.warping,
-                                       str(e)), None, sys.exc_info()[2]
+        # Turn GDAL PAM off to prevent *.aux.xml files when warping
+        # in-process, the gdalwarp engine sets it on the command line
+        pam_enabled = gdal.GetConfigOption('GDAL_PAM_ENABLED', None)
+        if engine == 'gdal_api':
+            gdal.SetConfigOption('GDAL_PAM_ENABLED', 'NO')
+
+        try:
+            # Warp the bands
+            if workers == 1:
+                for job in jobs:
+                    warp_band(*job)
+            else:
+                logger.info("Warping %d bands using %d workers"
+                            % (len(jobs), workers))
 
-            # Save the no data value since gdalwarp does not write it out when
-            # using the ENVI format
-            no_data_value = ds_band.GetNoDataValue()
-            if no_data_value is not None:
-                # TODO - We don't process any floating point data types.  Yet
-                # Convert to an integer then string
-                no_data_value = str(int(no_data_value))
+                # Threads are sufficient since the warping is performed by
+                # gdalwarp in a separate process or by GDAL, which releases
+                # the GIL while warping
+                pool = ThreadPool(processes=workers)
+                try:
+                    results = [pool.apply_async(warp_band, job)
+                               for job in jobs]
 
-            # Force a freeing of the memory
-            del (ds_band)
-            del (ds)
+                    pool.close()
 
-            tmp_img_filename = 'tmp-%s' % img_filename
-            tmp_hdr_filename = 'tmp-%s' % hdr_filename
-
-            warp_image(img_filename, tmp_img_filename,
-                       base_warp_command=base_warp_command,
-                       resample_method=resample_method,
-                       pixel_size=pixel_size,
-                       no_data_value=no_data_value)
-
-            ##################################################################
-            ##################################################################
-            # Get new everything for the re-projected band
-            ##################################################################
-            ##################################################################
-
-            # Update the tmp ENVI header with our own values for some fields
-            sb = StringIO()
-            with open(tmp_hdr_filename, 'r') as tmp_fd:
-                while True:
-                    line = tmp_fd.readline()
-                    if not line:
-                        break
-                    if (line.startswith('data ignore value')
-                            or line.startswith('description')):
-                        pass
-                    else:
-                        sb.write(line)
-
-                    if line.startswith('description'):
-                        # This may be on multiple lines so read lines until
-                        # we find the closing brace
-                        if not line.strip().endswith('}'):
-                            while 1:
-                                next_line = tmp_fd.readline()
-                                if (not next_line
-                                        or next_line.strip().endswith('}')):
-                                    break
-                        sb.write('description = {ESPA-generated file}\n')
-                    elif (line.startswith('data type')
-                          and (no_data_value is not None)):
-                        sb.write('data ignore value = %s\n' % no_data_value)
-            # END - with tmp_fd
-
-            # Do the actual replace here
-            with open(tmp_hdr_filename, 'w') as tmp_fd:
-                tmp_fd.write(sb.getvalue())
-
-            # Remove the original files, they are replaced in following code
-            if os.path.exists(img_filename):
-                os.unlink(img_filename)
-            if os.path.exists(hdr_filename):
-                os.unlink(hdr_filename)
-
-            # Rename the temps file back to the original name
-            os.rename(tmp_img_filename, img_filename)
-            os.rename(tmp_hdr_filename, hdr_filename)
-        # END for each band in the XML file
+                    # Retrieve each result so any failure is raised here
+                    for result in results:
+                        result.get()
+                finally:
+                    pool.terminate()
+                    pool.join()
+        finally:
+            if engine == 'gdal_api':
+                gdal.SetConfigOption('GDAL_PAM_ENABLED', pam_enabled)
 
         # Update the XML to reflect the new warped output
         update_espa_xml(parms, xml, xml_filename)
@@ -74,23 +74,29 @@ def process_requests(args, logger_name, queue_priority, request_priority):
         msg = "xmlrpc server was None... exiting"
         raise Exception(msg)
 
-    user = server.get_configuration('landsatds.username')
+    # Retrieve all of the configuration needed in a single call
+    config = server.get_configurations(['landsatds.username',
+                                        'landsatds.password',
+                                        'landsatds.host',
+                                        'ondemand_enabled'])
+
+    user = config['landsatds.username']
     if len(user) == 0:
         msg = "landsatds.username is not defined... exiting"
         raise Exception(msg)
 
-    pw = urllib.quote(server.get_configuration('landsatds.password'))
+    pw = urllib.quote(config['landsatds.password'])
     if len(pw) == 0:
         msg = "landsatds.password is not defined... exiting"
         raise Exception(msg)
 
-    host = server.get_configuration('landsatds.host')
+    host = config['landsatds.host']
     if len(host) == 0:
         msg = "landsatds.host is not defined... exiting"
         raise Exception(msg)
 
     # Use ondemand_enabled to determine if we should be processing or not
-    ondemand_enabled = server.get_configuration('ondemand_enabled')
+    ondemand_enabled = config['ondemand_enabled']
 
     # Determine the appropriate hadoop queue to use
     hadoop_job_queue = settings.HADOOP_QUEUE_MAPPING[queue_priority]
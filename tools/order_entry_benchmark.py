@@ -0,0 +1,174 @@
+#! /usr/bin/env python
+
+'''
+Description:
+  Compares the bulk Order.enter_new_order against the original
+  implementation, which classifies and saves each scene individually, for
+  orders of a configurable size.
+
+  Must be ran on a system with the web tier dependencies installed.  A
+  temporary sqlite database is built, nothing is written to the configured
+  database.
+'''
+
+import os
+import sys
+import time
+import json
+import random
+import datetime
+from argparse import ArgumentParser
+
+base_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, base_path)
+sys.path.insert(0, os.path.join(base_path, 'web'))
+
+from django.conf import settings as django_settings
+
+django_settings.configure(
+    DEBUG=False,
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3',
+                           'NAME': ':memory:'}},
+    INSTALLED_APPS=('django.contrib.auth',
+                    'django.contrib.contenttypes',
+                    'ordering'))
+
+import django
+if hasattr(django, 'setup'):
+    django.setup()
+
+from django.db import connection
+from django.db import transaction
+from django.contrib.auth.models import User
+from django.test.utils import CaptureQueriesContext
+
+from espa_common import sensor
+from ordering.models import Order
+from ordering.models import Scene
+
+
+LANDSAT_PREFIXES = ['LT5', 'LE7', 'LC8']
+
+
+# ============================================================================
+@transaction.atomic
+def per_scene_enter_new_order(username, order_source, scene_list,
+                              option_string, order_type, note=''):
+    '''
+    Description:
+      The original order entry, pared down to the database calls.  Each
+      scene is classified and saved in turn.
+    '''
+
+    user = User.objects.get(username=username)
+
+    order = Order()
+    order.orderid = Order.generate_order_id(user.email)
+    order.user = user
+    order.note = note
+    order.status = 'ordered'
+    order.order_source = order_source
+    order.order_type = order_type
+    order.order_date = datetime.datetime.now()
+    order.product_options = option_string
+    order.priority = 'low'
+    order.save()
+
+    for s in set(scene_list):
+
+        sensor_type = None
+
+        if s == 'plot':
+            sensor_type = 'plot'
+        elif isinstance(sensor.instance(s), sensor.Landsat):
+            sensor_type = 'landsat'
+        elif isinstance(sensor.instance(s), sensor.Modis):
+            sensor_type = 'modis'
+
+        scene = Scene()
+        scene.name = s
+        scene.order = order
+        scene.order_date = datetime.datetime.now()
+        scene.status = 'submitted'
+        scene.sensor_type = sensor_type
+        scene.note = ''
+        scene.save()
+
+    return order
+# END - per_scene_enter_new_order
+
+
+# ============================================================================
+def build_scene_list(scene_count):
+    '''
+    Description:
+      Build a list of unique synthetic Landsat scene ids.
+    '''
+
+    scenes = set()
+
+    while len(scenes) < scene_count:
+        scenes.add('%s%03d%03d2013%03dLGN00'
+                   % (random.choice(LANDSAT_PREFIXES),
+                      random.randint(1, 233),
+                      random.randint(1, 248),
+                      random.randint(1, 365)))
+
+    return list(scenes)
+# END - build_scene_list
+
+
+# ============================================================================
+def time_order_entry(function, username, scene_list):
+    '''
+    Description:
+      Enter an order and return the elapsed time, number of sql queries and
+      number of scenes stored.
+    '''
+
+    options = json.dumps(Order.get_default_options())
+
+    # start each run with cold sensor instances
+    sensor._instance_cache.clear()
+
+    with CaptureQueriesContext(connection) as queries:
+        start = time.time()
+        order = function(username, 'espa', scene_list, options,
+                         'level2_ondemand')
+        elapsed = time.time() - start
+
+    return (elapsed, len(queries), Scene.objects.filter(order=order).count())
+# END - time_order_entry
+
+
+# ============================================================================
+if __name__ == '__main__':
+
+    description = ("Benchmark the bulk Order.enter_new_order against the"
+                   " original per scene implementation")
+    parser = ArgumentParser(description=description)
+
+    parser.add_argument('--scenes', action='store',
+                        dest='scenes',
+                        required=False,
+                        default=10000,
+                        help="number of scenes in the order")
+
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    User(username='benchmark', email='benchmark@example.com').save()
+
+    scene_list = build_scene_list(int(args.scenes))
+
+    print("%-12s %10s %10s %10s"
+          % ('method', 'time(s)', 'queries', 'scenes'))
+
+    for (name, function) in [('per scene', per_scene_enter_new_order),
+                             ('bulk', Order.enter_new_order)]:
+        print("%-12s %10.3f %10d %10d"
+              % ((name,) + time_order_entry(function, 'benchmark',
+                                            scene_list)))
+
+    sys.exit(0)
@@ -0,0 +1,202 @@
+#! /usr/bin/env python
+
+'''
+Description:
+  Compares the batched, adaptively densified warp.projection_minbox against
+  the original implementation, which walks the boundary in pixel size steps
+  transforming a single point at a time.
+
+  Must be ran on a system with the processing code installed, since it uses
+  warp.py from there.
+'''
+
+import os
+import sys
+import time
+from argparse import ArgumentParser
+from osgeo import osr
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'processing'))
+
+from logger_factory import EspaLogging
+import settings
+import warp
+
+
+# Large decimal degree extents which are costly for the original algorithm
+BENCHMARK_CASES = [
+    # Name, ul_lon, ul_lat, lr_lon, lr_lat, target_proj4
+    ('CONUS AEA', -125.0, 50.0, -66.0, 24.0,
+     warp.build_albers_proj4_string(29.5, 45.5, 23.0, -96.0, 0.0, 0.0,
+                                    settings.NAD83)),
+    ('Arctic PS', -180.0, 85.0, 180.0, 60.0,
+     warp.build_ps_proj4_string(71.0, 0.0, 90.0, 0.0, 0.0)),
+    ('Africa SINU', -20.0, 38.0, 52.0, -35.0,
+     warp.build_sinu_proj4_string(0.0, 0.0, 0.0)),
+    ('UTM 14N', -102.0, 49.0, -96.0, 30.0,
+     warp.build_utm_proj4_string(14, 'north'))
+]
+
+
+# ============================================================================
+def point_loop_minbox(ul_lon, ul_lat, lr_lon, lr_lat,
+                      target_proj4, pixel_size, pixel_size_units):
+    '''
+    Description:
+      The original minbox algorithm, transforming one point at a time in
+      pixel size steps along the boundary.
+    '''
+
+    source_srs = osr.SpatialReference()
+    source_srs.ImportFromProj4(settings.GEOGRAPHIC_PROJ4_STRING)
+
+    target_srs = osr.SpatialReference()
+    target_srs.ImportFromProj4(target_proj4)
+
+    transform = osr.CoordinateTransformation(source_srs, target_srs)
+
+    step = pixel_size
+    if pixel_size_units == 'meters':
+        step = settings.DEG_FOR_1_METER * pixel_size
+
+    longitudes = np.arange(ul_lon, lr_lon, step, np.float)
+    latitudes = np.arange(lr_lat, ul_lat, step, np.float)
+
+    (ul_x, ul_y, z) = transform.TransformPoint(ul_lon, ul_lat)
+    (lr_x, lr_y, z) = transform.TransformPoint(lr_lon, lr_lat)
+
+    min_x = min(ul_x, lr_x)
+    max_x = max(ul_x, lr_x)
+    min_y = min(ul_y, lr_y)
+    max_y = max(ul_y, lr_y)
+
+    for lon in longitudes:
+        (ux, uy, z) = transform.TransformPoint(lon, ul_lat)
+        (lx, ly, z) = transform.TransformPoint(lon, lr_lat)
+
+        min_x = min(ux, lx, min_x)
+        max_x = max(ux, lx, max_x)
+        min_y = min(uy, ly, min_y)
+        max_y = max(uy, ly, max_y)
+
+    for lat in latitudes:
+        (lx, ly, z) = transform.TransformPoint(ul_lon, lat)
+        (rx, ry, z) = transform.TransformPoint(lr_lon, lat)
+
+        min_x = min(rx, lx, min_x)
+        max_x = max(rx, lx, max_x)
+        min_y = min(ry, ly, min_y)
+        max_y = max(ry, ly, max_y)
+
+    return (min_x, min_y, max_x, max_y)
+# END - point_loop_minbox
+
+
+# ============================================================================
+def clear_projection_caches():
+    '''
+    Description:
+      Empty the warp process-wide caches so the next projection_minbox call
+      does the full calculation.
+    '''
+
+    with warp.projection_cache_lock:
+        warp.proj4_cache.clear()
+        warp.srs_cache.clear()
+        warp.transform_cache.clear()
+        warp.minbox_cache.clear()
+# END - clear_projection_caches
+
+
+# ============================================================================
+def time_minbox(function, args, repeat, setup=None):
+    '''
+    Description:
+      Run the minbox function the specified number of times and return the
+      best time along with the extents.  The setup function, when provided,
+      is called before each timed run.
+    '''
+
+    best = None
+    extents = None
+    for count in range(repeat):
+        if setup is not None:
+            setup()
+
+        start = time.time()
+        extents = function(*args)
+        elapsed = time.time() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return (best, extents)
+# END - time_minbox
+
+
+# ============================================================================
+if __name__ == '__main__':
+
+    description = ("Benchmark the batched projection_minbox against the"
+                   " original point at a time implementation using large"
+                   " decimal degree extents")
+    parser = ArgumentParser(description=description)
+
+    parser.add_argument('--pixel_size', action='store',
+                        dest='pixel_size',
+                        required=False,
+                        default=30.0,
+                        help="output pixel size used to step the boundary")
+
+    parser.add_argument('--pixel_size_units', action='store',
+                        dest='pixel_size_units',
+                        required=False,
+                        default='meters',
+                        help="units for the pixel size value")
+
+    parser.add_argument('--repeat', action='store',
+                        dest='repeat',
+                        required=False,
+                        default=3,
+                        help="number of timing runs for each case")
+
+    args = parser.parse_args()
+
+    # warp.projection_minbox logs through the processing logger
+    EspaLogging.configure(settings.PROCESSING_LOGGER, order='benchmark',
+                          product='projection_minbox')
+
+    pixel_size = float(args.pixel_size)
+    repeat = int(args.repeat)
+
+    # cold times include building the transformation and the minbox, warm
+    # times are answered from the warp process-wide caches
+    print("%-12s %12s %12s %12s %9s %14s"
+          % ('case', 'loop(s)', 'cold(s)', 'warm(s)', 'speedup',
+             'max diff(m)'))
+
+    for (name, ul_lon, ul_lat, lr_lon, lr_lat, target_proj4) in \
+            BENCHMARK_CASES:
+
+        minbox_args = (ul_lon, ul_lat, lr_lon, lr_lat, target_proj4,
+                       pixel_size, args.pixel_size_units)
+
+        (loop_time, loop_extents) = time_minbox(point_loop_minbox,
+                                                minbox_args, repeat)
+        (cold_time, batch_extents) = time_minbox(warp.projection_minbox,
+                                                 minbox_args, repeat,
+                                                 clear_projection_caches)
+        (warm_time, warm_extents) = time_minbox(warp.projection_minbox,
+                                                minbox_args, repeat)
+
+        difference = max(abs(a - b) for (a, b)
+                         in zip(loop_extents, batch_extents))
+
+        # the speedup compares full calculations, not cache lookups
+        print("%-12s %12.4f %12.4f %12.6f %8.1fx %14.4f"
+              % (name, loop_time, cold_time, warm_time,
+                 loop_time / cold_time, difference))
+
+    sys.exit(0)
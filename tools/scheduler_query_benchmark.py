@@ -0,0 +1,281 @@
+#! /usr/bin/env python
+
+'''
+Description:
+  Compares the set based core.get_products_to_process against the original
+  implementation, which queries and requests download urls one contact at a
+  time, using a synthetic database of oncache and completed scenes.
+
+  Must be ran on a system with the web tier dependencies installed.  A
+  temporary sqlite database is built, nothing is written to the configured
+  database.  LTA is simulated with a configurable round trip latency.
+'''
+
+import os
+import sys
+import time
+import json
+import random
+import datetime
+from argparse import ArgumentParser
+
+base_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, base_path)
+sys.path.insert(0, os.path.join(base_path, 'web'))
+
+from django.conf import settings as django_settings
+
+django_settings.configure(
+    DEBUG=False,
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3',
+                           'NAME': ':memory:'}},
+    INSTALLED_APPS=('django.contrib.auth',
+                    'django.contrib.contenttypes',
+                    'ordering'))
+
+import django
+if hasattr(django, 'setup'):
+    django.setup()
+
+from django.db import connection
+from django.db import transaction
+from django.contrib.auth.models import User
+from django.test.utils import CaptureQueriesContext
+
+from ordering import core
+from ordering.models import Order
+from ordering.models import Scene
+from ordering.models import UserProfile
+
+
+LANDSAT_PREFIXES = ['LT5', 'LE7', 'LC8']
+
+
+# ============================================================================
+class SimulatedLTA(object):
+    '''
+    Description:
+      Stands in for lta.get_download_urls, sleeping for the round trip
+      latency and counting the requests made.
+    '''
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.requests = 0
+
+    def get_download_urls(self, product_list, contact_id):
+        self.requests += 1
+        time.sleep(self.latency)
+
+        return dict((name, {'lta_code': 'T272',
+                            'sensor': 'LANDSAT_8',
+                            'status': 'available',
+                            'download_url': 'http://cache/%s.tar.gz' % name})
+                    for name in product_list)
+# END - SimulatedLTA
+
+
+# ============================================================================
+def per_contact_products_to_process(record_limit=500,
+                                    product_types=['landsat', 'modis']):
+    '''
+    Description:
+      The original scheduler query, pared down to the database and LTA
+      calls.  Contact ids are found first and then each contact's scenes
+      and download urls are retrieved in turn.
+    '''
+
+    filters = {'order__scene__status': 'oncache',
+               'order__scene__sensor_type__in': product_types}
+
+    u = User.objects.filter(**filters)
+    u = u.select_related('userprofile__contactid').order_by(
+        'order__order_date')
+
+    cids = list(set([c[0] for c in u.values_list('userprofile__contactid')]))
+
+    results = []
+
+    for cid in cids:
+
+        if record_limit is not None and len(results) + 1 > record_limit:
+            break
+
+        filters = {'order__user__userprofile__contactid': cid,
+                   'status': 'oncache'}
+
+        scenes = Scene.objects.filter(**filters).select_related('order')
+        scenes = scenes.order_by('order__order_date')[:record_limit]
+
+        landsat = [s.name for s in scenes if s.sensor_type == 'landsat']
+        landsat_urls = core.lta.get_download_urls(landsat, cid)
+
+        modis = [s.name for s in scenes if s.sensor_type == 'modis']
+        modis_urls = core.lpdaac.get_download_urls(modis)
+
+        for scene in scenes:
+
+            if record_limit is not None and len(results) + 1 > record_limit:
+                break
+
+            urls = landsat_urls
+            if scene.sensor_type == 'modis':
+                urls = modis_urls
+
+            results.append({'orderid': scene.order.orderid,
+                            'product_type': scene.sensor_type,
+                            'scene': scene.name,
+                            'priority': scene.order.priority,
+                            'options': json.loads(scene.order.product_options),
+                            'download_url':
+                                urls[scene.name]['download_url']})
+
+    return results
+# END - per_contact_products_to_process
+
+
+# ============================================================================
+def build_database(scene_count, user_count, oncache_fraction):
+    '''
+    Description:
+      Populate the database with users, orders and scenes.  Each order holds
+      100 scenes and the requested fraction of all scenes is left oncache.
+    '''
+
+    options = json.dumps(Order.get_default_options())
+    now = datetime.datetime.now()
+
+    with transaction.atomic():
+        for index in xrange(user_count):
+            user = User(username='user%06d' % index, email='u@example.com')
+            user.save()
+            UserProfile(user=user, contactid=str(index)).save()
+
+    users = list(User.objects.all())
+
+    orders = list()
+    for index in xrange(scene_count / 100):
+        orders.append(Order(orderid='order%07d' % index,
+                            email='u@example.com',
+                            user=random.choice(users),
+                            order_type='level2_ondemand',
+                            priority='normal',
+                            order_date=now - datetime.timedelta(minutes=index),
+                            status='ordered',
+                            product_options=options,
+                            order_source='espa'))
+
+    with transaction.atomic():
+        Order.objects.bulk_create(orders, batch_size=1000)
+
+    order_ids = list(Order.objects.values_list('id', flat=True))
+
+    scenes = list()
+    for index in xrange(scene_count):
+        status = 'complete'
+        if random.random() < oncache_fraction:
+            status = 'oncache'
+
+        scenes.append(Scene(name='%s%03d%03d2013%03dLGN00'
+                                 % (random.choice(LANDSAT_PREFIXES),
+                                    random.randint(1, 233),
+                                    random.randint(1, 248),
+                                    random.randint(1, 365)),
+                            sensor_type='landsat',
+                            order_id=order_ids[index / 100],
+                            status=status))
+
+        if len(scenes) == 10000:
+            with transaction.atomic():
+                Scene.objects.bulk_create(scenes)
+            scenes = list()
+
+    if len(scenes) > 0:
+        with transaction.atomic():
+            Scene.objects.bulk_create(scenes)
+# END - build_database
+
+
+# ============================================================================
+def time_scheduler(function, simulated_lta, record_limit):
+    '''
+    Description:
+      Run the scheduler query and return the elapsed time, number of sql
+      queries, number of LTA requests and number of products returned.
+    '''
+
+    simulated_lta.requests = 0
+
+    with CaptureQueriesContext(connection) as queries:
+        start = time.time()
+        with transaction.atomic():
+            results = function(record_limit=record_limit)
+        elapsed = time.time() - start
+
+    return (elapsed, len(queries), simulated_lta.requests, len(results))
+# END - time_scheduler
+
+
+# ============================================================================
+if __name__ == '__main__':
+
+    description = ("Benchmark the set based get_products_to_process against"
+                   " the original per contact implementation")
+    parser = ArgumentParser(description=description)
+
+    parser.add_argument('--scenes', action='store',
+                        dest='scenes',
+                        required=False,
+                        default=1000000,
+                        help="number of scenes in the synthetic database")
+
+    parser.add_argument('--users', action='store',
+                        dest='users',
+                        required=False,
+                        default=2000,
+                        help="number of users owning the orders")
+
+    parser.add_argument('--oncache_fraction', action='store',
+                        dest='oncache_fraction',
+                        required=False,
+                        default=0.05,
+                        help="fraction of the scenes which are oncache")
+
+    parser.add_argument('--record_limit', action='store',
+                        dest='record_limit',
+                        required=False,
+                        default=500,
+                        help="number of products requested per call")
+
+    parser.add_argument('--lta_latency', action='store',
+                        dest='lta_latency',
+                        required=False,
+                        default=0.2,
+                        help="simulated LTA round trip time in seconds")
+
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    start = time.time()
+    build_database(int(args.scenes), int(args.users),
+                   float(args.oncache_fraction))
+    print("Built %s scenes in %.1f seconds"
+          % (args.scenes, time.time() - start))
+
+    simulated_lta = SimulatedLTA(float(args.lta_latency))
+    core.lta.get_download_urls = simulated_lta.get_download_urls
+
+    record_limit = int(args.record_limit)
+
+    print("%-12s %10s %10s %10s %10s"
+          % ('method', 'time(s)', 'queries', 'lta calls', 'products'))
+
+    for (name, function) in [('per contact',
+                              per_contact_products_to_process),
+                             ('set based', core.get_products_to_process)]:
+        print("%-12s %10.3f %10d %10d %10d"
+              % ((name,) + time_scheduler(function, simulated_lta,
+                                          record_limit)))
+
+    sys.exit(0)
@@ -0,0 +1,185 @@
+#! /usr/bin/env python
+
+'''
+Description:
+  Compares the precompiled, cached sensor.instance against the original
+  implementation, which builds and tries every product pattern in turn for
+  each product id.
+
+  Must be ran on a system with the processing code installed, since it uses
+  sensor.py from there.
+'''
+
+import os
+import re
+import sys
+import time
+import random
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'processing'))
+
+import settings
+import sensor
+
+
+LANDSAT_PREFIXES = ['LT4', 'LT5', 'LE7', 'LC8', 'LO8']
+MODIS_SHORT_NAMES = ['MOD09A1', 'MOD09GA', 'MOD09GQ', 'MOD09Q1',
+                     'MOD13A1', 'MOD13A2', 'MOD13A3', 'MOD13Q1',
+                     'MYD09A1', 'MYD09GA', 'MYD09GQ', 'MYD09Q1',
+                     'MYD13A1', 'MYD13A2', 'MYD13A3', 'MYD13Q1']
+
+
+# ============================================================================
+def regex_loop_instance(product_id):
+    '''
+    Description:
+      The original sensor.instance, building the pattern dictionary and
+      trying each pattern until one matches.
+    '''
+
+    _id = product_id.lower().strip()
+
+    if _id.endswith(settings.MODIS_INPUT_FILENAME_EXTENSION):
+        index = _id.index(settings.MODIS_INPUT_FILENAME_EXTENSION)
+        product_id = product_id[0:index]
+        _id = _id[0:index]
+
+    elif _id.endswith(settings.LANDSAT_INPUT_FILENAME_EXTENSION):
+        index = _id.index(settings.LANDSAT_INPUT_FILENAME_EXTENSION)
+        product_id = product_id[0:index]
+        _id = _id[0:index]
+
+    modis = r'\.a\d{7}\.h\d{2}v\d{2}\.005\.\d{13}$'
+
+    instances = {
+        'tm': (r'^lt[4|5]\d{3}\d{3}\d{4}\d{3}[a-z]{3}[a-z0-9]{2}$',
+               sensor.LandsatTM),
+        'etm': (r'^le7\d{3}\d{3}\d{4}\d{3}\w{3}.{2}$', sensor.LandsatETM),
+        'olitirs': (r'^lc8\d{3}\d{3}\d{4}\d{3}\w{3}.{2}$',
+                    sensor.LandsatOLITIRS),
+        'oli': (r'^lo8\d{3}\d{3}\d{4}\d{3}\w{3}.{2}$', sensor.LandsatOLI),
+        'mod09a1': (r'^mod09a1' + modis, sensor.ModisTerra09A1),
+        'mod09ga': (r'^mod09ga' + modis, sensor.ModisTerra09GA),
+        'mod09gq': (r'^mod09gq' + modis, sensor.ModisTerra09GQ),
+        'mod09q1': (r'^mod09q1' + modis, sensor.ModisTerra09Q1),
+        'mod13a1': (r'^mod13a1' + modis, sensor.ModisTerra13A1),
+        'mod13a2': (r'^mod13a2' + modis, sensor.ModisTerra13A2),
+        'mod13a3': (r'^mod13a3' + modis, sensor.ModisTerra13A3),
+        'mod13q1': (r'^mod13q1' + modis, sensor.ModisTerra13Q1),
+        'myd09a1': (r'^myd09a1' + modis, sensor.ModisAqua09A1),
+        'myd09ga': (r'^myd09ga' + modis, sensor.ModisAqua09GA),
+        'myd09gq': (r'^myd09gq' + modis, sensor.ModisAqua09GQ),
+        'myd09q1': (r'^myd09q1' + modis, sensor.ModisAqua09Q1),
+        'myd13a1': (r'^myd13a1' + modis, sensor.ModisAqua13A1),
+        'myd13a2': (r'^myd13a2' + modis, sensor.ModisAqua13A2),
+        'myd13a3': (r'^myd13a3' + modis, sensor.ModisAqua13A3),
+        'myd13q1': (r'^myd13q1' + modis, sensor.ModisAqua13Q1)
+    }
+
+    for key in instances.iterkeys():
+        if re.match(instances[key][0], _id):
+            return instances[key][1](product_id.strip())
+
+    msg = "[%s] is not a supported sensor product" % product_id
+    raise sensor.ProductNotImplemented(product_id, msg)
+# END - regex_loop_instance
+
+
+# ============================================================================
+def generate_product_ids(count, unique):
+    '''
+    Description:
+      Build a list of count product ids drawn from unique distinct landsat
+      and modis ids.
+    '''
+
+    distinct = list()
+    for index in xrange(unique):
+        if index % 2 == 0:
+            distinct.append('%s%03d%03d%04d%03dEDC00'
+                            % (random.choice(LANDSAT_PREFIXES),
+                               random.randint(1, 233), random.randint(1, 248),
+                               random.randint(1982, 2015),
+                               random.randint(1, 365)))
+        else:
+            distinct.append('%s.A%04d%03d.h%02dv%02d.005.%013d'
+                            % (random.choice(MODIS_SHORT_NAMES),
+                               random.randint(2000, 2015),
+                               random.randint(1, 365),
+                               random.randint(0, 35), random.randint(0, 17),
+                               random.randint(0, 9999999999999)))
+
+    return [random.choice(distinct) for index in xrange(count)]
+# END - generate_product_ids
+
+
+# ============================================================================
+def time_instances(function, product_ids):
+    '''
+    Description:
+      Create a product for every id and return the elapsed time.
+    '''
+
+    start = time.time()
+    for product_id in product_ids:
+        function(product_id)
+
+    return time.time() - start
+# END - time_instances
+
+
+# ============================================================================
+if __name__ == '__main__':
+
+    description = ("Benchmark the precompiled sensor.instance against the"
+                   " original pattern loop")
+    parser = ArgumentParser(description=description)
+
+    parser.add_argument('--count', action='store',
+                        dest='count',
+                        required=False,
+                        default=100000,
+                        help="number of product ids to create products for")
+
+    parser.add_argument('--unique', action='store',
+                        dest='unique',
+                        required=False,
+                        default=5000,
+                        help="number of distinct product ids in the list")
+
+    args = parser.parse_args()
+
+    count = int(args.count)
+    product_ids = generate_product_ids(count, int(args.unique))
+
+    # Verify both implementations agree before timing them
+    for product_id in set(product_ids):
+        if (type(regex_loop_instance(product_id)) !=
+                type(sensor.instance(product_id))):
+            raise Exception("Implementations disagree on [%s]" % product_id)
+
+    # Time the compiled dispatch on its own with the cache cleared and
+    # disabled, then with the cache warm
+    cache_size = settings.SENSOR_INSTANCE_CACHE_SIZE
+    settings.SENSOR_INSTANCE_CACHE_SIZE = 0
+    sensor._instance_cache.clear()
+    compiled_time = time_instances(sensor.instance, product_ids)
+
+    settings.SENSOR_INSTANCE_CACHE_SIZE = cache_size
+    time_instances(sensor.instance, product_ids)
+    cached_time = time_instances(sensor.instance, product_ids)
+
+    loop_time = time_instances(regex_loop_instance, product_ids)
+
+    print("%-10s %12s %14s %9s" % ('method', 'total(s)', 'per id(us)',
+                                   'speedup'))
+    for (name, elapsed) in [('loop', loop_time),
+                            ('compiled', compiled_time),
+                            ('cached', cached_time)]:
+        print("%-10s %12.4f %14.2f %8.1fx"
+              % (name, elapsed, elapsed / count * 1000000.0,
+                 loop_time / elapsed))
+
+    sys.exit(0)
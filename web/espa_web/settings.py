@@ -263,4 +263,25 @@ else:
 # cache timeouts by usage (in seconds)
 SYSTEM_MESSAGE_CACHE_TIMEOUT = 60
 
+# configuration values are cached in each process, changes made in another
+# process take up to this long to appear
+CONFIGURATION_CACHE_TIMEOUT = 60
+
+# whether a product was found in inventory is remembered this long, so
+# resubmitting an order after correcting a mistake doesn't verify it again
+PRODUCT_VERIFICATION_CACHE_TIMEOUT = 600
+
+# the latest completion date for a status feed is also cleared whenever a
+# product completes, this bounds how long any other change takes to appear
+STATUS_FEED_CACHE_TIMEOUT = 300
+
+# default and maximum number of products in a status feed page
+STATUS_FEED_PAGE_SIZE = 1000
+STATUS_FEED_MAX_PAGE_SIZE = 10000
+
+# number of rows read from the database at a time while streaming a status
+# feed, and the number of bytes rendered before they are sent
+STATUS_FEED_FETCH_SIZE = 500
+STATUS_FEED_BUFFER_SIZE = 65536
+
 
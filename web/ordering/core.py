@@ -11,8 +11,12 @@ from models import UserProfile
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import transaction
+from django.core.cache import cache
+from multiprocessing.pool import ThreadPool
 import json
+import hashlib
 import datetime
+import time
 import urllib
 import lta
 import lpdaac
@@ -180,12 +184,18 @@ def set_products_unavailable(products, reason):
         if not isinstance(p, Scene):
             raise TypeError()
 
-    for p in products:
-        p.status = 'unavailable'
-        p.completion_date = datetime.datetime.now()
-        p.note = reason
-        p.save()
+    if len(products) == 0:
+        return
+
+    filter_args = {'id__in': [p.id for p in products]}
+
+    update_args = {'status': 'unavailable',
+                   'completion_date': datetime.datetime.now(),
+                   'note': reason}
 
+    Scene.objects.filter(**filter_args).update(**update_args)
+
+    for p in products:
         if p.order.order_source == 'ee':
             lta.update_order_status(p.order.ee_order_id, p.ee_unit_id, 'R')
 
@@ -206,6 +216,8 @@ def handle_retry_products():
 @transaction.atomic
 def handle_onorder_landsat_products():
 
+    start = time.time()
+
     filters = {
         'tram_order_id__isnull': False,
         'status': 'onorder'
@@ -217,11 +229,22 @@ def handle_onorder_landsat_products():
     product_tram_ids = products.values_list('tram_order_id')
     tram_ids = list(set([p[0] for p in product_tram_ids]))
 
-    rejected = []
-    available = []
+    print("handle_onorder_landsat_products: found %i tram orders in %.2fs"
+          % (len(tram_ids), time.time() - start))
+
+    start = time.time()
+
+    order_statuses = lta.get_order_statuses(tram_ids)
+
+    print("handle_onorder_landsat_products: polled %i tram orders in %.2fs"
+          % (len(order_statuses), time.time() - start))
 
-    for tid in tram_ids:
-        order_status = lta.get_order_status(tid)
+    start = time.time()
+
+    rejected = set()
+    available = set()
+
+    for order_status in order_statuses.itervalues():
 
         # There are a variety of product statuses that come back from tram
         # on this call.  I is inprocess, Q is queued for the backend system,
@@ -229,26 +252,35 @@ def handle_onorder_landsat_products():
         # all the statuses except for R and C because we don't care.
         # In the case of D (duplicates), when the first product completes, all
         # duplicates will also be marked C
-        for unit in order_status['units']:
+        for unit in order_status.get('units', []):
             if unit['unit_status'] == 'R':
-                rejected.append(unit['sceneid'])
+                rejected.add(unit['sceneid'])
             elif unit['unit_status'] == 'C':
-                available.append(unit['sceneid'])
+                available.add(unit['sceneid'])
 
     #Go find all the tram units that were rejected and mark them
     #unavailable in our database.  Note that we are not looking for
     #specific tram_order_id/sceneids as duplicate tram orders may have been
     #submitted and we want to bulk update all scenes that are onorder but
     #have been rejected
+    rejected_products = list()
     if len(rejected) > 0:
         rejected_products = [p for p in products if p.name in rejected]
+
+    print("handle_onorder_landsat_products: matched %i rejected and %i "
+          "available units in %.2fs" % (len(rejected), len(available),
+                                        time.time() - start))
+
+    start = time.time()
+
+    if len(rejected_products) > 0:
         set_products_unavailable(rejected_products,
                                  'Level 1 product could not be produced')
 
     #Now update everything that is now on cache
     filters = {
         'status': 'onorder',
-        'name__in': available
+        'name__in': list(available)
     }
     updates = {
         'status': 'oncache',
@@ -257,6 +289,10 @@ def handle_onorder_landsat_products():
     if len(available) > 0:
         Scene.objects.filter(**filters).update(**updates)
 
+    print("handle_onorder_landsat_products: updated %i unavailable and %i "
+          "oncache products in %.2fs" % (len(rejected_products),
+                                         len(available), time.time() - start))
+
 
 def handle_submitted_landsat_products():
 
@@ -389,13 +425,17 @@ def handle_submitted_modis_products():
     filter_args = {'status': 'submitted', 'sensor_type': 'modis'}
     modis_products = Scene.objects.filter(**filter_args)
 
-    if len(modis_products) > 0:
+    # the same product may be in many orders, only check it once
+    names = list(set([p[0] for p in modis_products.values_list('name')]))
+
+    if len(names) > 0:
 
-        oncache_list = list()
+        verified = lpdaac.verify_products(names)
 
-        for product in modis_products:
-            if lpdaac.input_exists(product.name):
-                oncache_list.append(product.name)
+        oncache_list = [name for name in verified if verified[name]]
+
+        if len(oncache_list) == 0:
+            return
 
         filter_args = {'status': 'submitted',
                        'name__in': oncache_list,
@@ -450,6 +490,80 @@ def handle_submitted_products():
     handle_submitted_plot_products()
 
 
+def rank_products_to_process(candidates, record_limit):
+    '''Gives every contact a fair share of the products to process.  Each
+    product is ranked by its position in its contact's queue, so the oldest
+    product of every contact is processed before the second oldest of any.
+
+    Keyword args:
+    candidates - (scene id, contact id) tuples ordered by order date
+    record_limit - The maximum number of scene ids to return or None
+
+    Returns:
+    A list of scene ids in the order they should be processed
+    '''
+
+    positions = {}
+    ranked = []
+
+    for scene_id, contact_id in candidates:
+        rank = positions.get(contact_id, 0)
+
+        # products past the limit within their own contact can't be selected
+        if record_limit is not None and rank >= record_limit:
+            continue
+
+        positions[contact_id] = rank + 1
+        ranked.append((rank, len(ranked), scene_id))
+
+    ranked.sort()
+
+    if record_limit is not None:
+        ranked = ranked[:record_limit]
+
+    return [scene_id for rank, position, scene_id in ranked]
+
+
+def get_landsat_download_urls(products_by_contact, workers=None):
+    '''Retrieves the landsat download urls for many contacts at once.  LTA
+    requires a separate request for every contact, so they are sent
+    concurrently.
+
+    Keyword args:
+    products_by_contact - A dict of contact id:list of landsat product names
+    workers - The maximum number of concurrent requests.  Defaults to
+              settings.LTA_DOWNLOAD_URL_WORKERS
+
+    Returns:
+    A dict of contact id:the lta.get_download_urls() result for the contact
+    '''
+
+    urls = {}
+
+    if len(products_by_contact) == 0:
+        return urls
+
+    if workers is None:
+        workers = espa_common.settings.LTA_DOWNLOAD_URL_WORKERS
+    workers = max(1, min(int(workers), len(products_by_contact)))
+
+    pool = ThreadPool(workers)
+    try:
+        results = list()
+        for cid, products in products_by_contact.iteritems():
+            result = pool.apply_async(lta.get_download_urls, (products, cid))
+            results.append((cid, result))
+        pool.close()
+
+        for cid, result in results:
+            urls[cid] = result.get()
+    finally:
+        pool.terminate()
+        pool.join()
+
+    return urls
+
+
 @transaction.atomic
 def get_products_to_process(record_limit=500,
                             for_user=None,
@@ -465,22 +579,12 @@ def get_products_to_process(record_limit=500,
 
     # use kwargs so we can dynamically build the filter criteria
     filters = {
-        'order__scene__status': 'oncache'
+        'status': 'oncache'
     }
 
-    #optimize the query so it creates a join call rather than executing
-    #multiple database calls for the related fields
-    select_related = ('order__orderid,'
-                      'order__priority,'
-                      'order__product_options,'
-                      'userprofile__contactid')
-
-    # use orderby for the orderby clause
-    orderby = 'order__order_date'
-
     if for_user is not None:
         # Find orders submitted by a specific user
-        filters['username'] = for_user
+        filters['order__user__username'] = for_user
 
     if priority is not None:
         # retrieve by specified priority
@@ -488,110 +592,107 @@ def get_products_to_process(record_limit=500,
 
     if product_types is not None:
         #filter based on what user asked for... modis, landsat or plot
-        filters['order__scene__sensor_type__in'] = product_types
+        filters['sensor_type__in'] = product_types
 
-    u = User.objects.filter(**filters)
-    u = u.select_related(select_related).order_by(orderby)
+    # select the next batch across all users in a single narrow query,
+    # then rank it so every user gets a fair share
+    orderby = ('order__order_date', 'id')
+
+    candidates = Scene.objects.filter(**filters).order_by(*orderby)
+    candidates = candidates.values_list('id',
+                                        'order__user__userprofile__contactid')
+    candidates = list(candidates.iterator())
+
+    contact_ids = dict(candidates)
+
+    selected = rank_products_to_process(candidates, record_limit)
+
+    #optimize the query so it creates a join call rather than executing
+    #multiple database calls for the related fields
+    scenes = {}
+    chunk_size = espa_common.settings.SCHEDULER_QUERY_CHUNK_SIZE
+    for index in xrange(0, len(selected), chunk_size):
+        chunk = selected[index:index + chunk_size]
+        chunk_scenes = Scene.objects.filter(id__in=chunk)
+        for scene in chunk_scenes.select_related('order'):
+            scenes[scene.id] = scene
 
-    #pull all the cids but cast to set() to eliminate dups then back to list
-    #to support index based iteration
-    cids = list(set([c[0] for c in u.values_list('userprofile__contactid')]))
+    scenes = [scenes[scene_id] for scene_id in selected if scene_id in scenes]
+
+    # one landsat url request per contact, all made at once
+    landsat = {}
+    for scene in scenes:
+        if scene.sensor_type == 'landsat':
+            cid = contact_ids[scene.id]
+            landsat.setdefault(cid, list()).append(scene.name)
+
+    landsat_urls = get_landsat_download_urls(landsat)
+
+    modis = [s.name for s in scenes if s.sensor_type == 'modis']
+    modis_urls = lpdaac.get_download_urls(modis)
 
     results = []
 
-    for cid in cids:
+    for scene in scenes:
 
-        if record_limit is not None and len(results) + 1 > record_limit:
-            break
+        dload_url = None
 
-        filters = {
-            'order__user__userprofile__contactid': cid,
-            'status': 'oncache'
-        }
+        if scene.sensor_type == 'landsat':
 
-        if priority is not None:
-            filters['order__priority'] = priority
+            urls = landsat_urls[contact_ids[scene.id]]
 
-        select_related = 'order'
+            if ('status' in urls[scene.name] and
+                    urls[scene.name]['status'] != 'available'):
 
-        orderby = 'order__order_date'
+                    try:
+                        lookup = espa_common.settings.RETRY
+                        limit = lookup['retry_missing_l1']['retry_limit']
+                        timeout = lookup['retry_missing_l1']['timeout']
+                        ts = datetime.datetime.now()
+                        after = ts + datetime.timedelta(seconds=timeout)
 
-        scenes = Scene.objects.filter(**filters)
-        scenes = scenes.select_related(select_related)
+                        set_product_retry(scene.name,
+                                          scene.order.orderid,
+                                          'get_products_to_process',
+                                          'product was not available',
+                                          'reorder missing level1 product',
+                                          after, limit)
+                    except:
+                        set_product_error(scene.name, scene.order.orderid,
+                                          'get_products_to_process',
+                                          ('level1 product data '
+                                           'not available after EE call '
+                                           'marked product as available'))
+                    continue
 
-        if record_limit is not None:
-            scenes = scenes.order_by(orderby)[:record_limit]
-        else:
-            scenes = scenes.order_by(orderby)
-
-        #landsat = [s.name for s in scenes where s.sensor_type = 'landsat']
-        landsat = [s.name for s in scenes if s.sensor_type == 'landsat']
-        landsat_urls = lta.get_download_urls(landsat, cid)
-
-        modis = [s.name for s in scenes if s.sensor_type == 'modis']
-        modis_urls = lpdaac.get_download_urls(modis)
-
-        for scene in scenes:
-
-            if record_limit is not None and len(results) + 1 > record_limit:
-                break
-
-            dload_url = None
-
-            if scene.sensor_type == 'landsat':
-
-                if ('status' in landsat_urls[scene.name] and
-                        landsat_urls[scene.name]['status'] != 'available'):
-
-                        try:
-                            lookup = espa_common.settings.RETRY
-                            limit = lookup['retry_missing_l1']['retry_limit']
-                            timeout = lookup['retry_missing_l1']['timeout']
-                            ts = datetime.datetime.now()
-                            after = ts + datetime.timedelta(seconds=timeout)
-
-                            set_product_retry(scene.name,
-                                              scene.order.orderid,
-                                              'get_products_to_process',
-                                              'product was not available',
-                                              'reorder missing level1 product',
-                                              after, limit)
-                        except:
-                            set_product_error(scene.name, scene.order.orderid,
-                                              'get_products_to_process',
-                                              ('level1 product data '
-                                               'not available after EE call '
-                                               'marked product as available'))
-                        continue
-
-                if 'download_url' in landsat_urls[scene.name]:
-                    dload_url = landsat_urls[scene.name]['download_url']
-                    if encode_urls:
-                        dload_url = urllib.quote(dload_url, '')
-
-            elif scene.sensor_type == 'modis':
-                if 'download_url' in modis_urls[scene.name]:
-                    dload_url = modis_urls[scene.name]['download_url']
-
-                    if encode_urls:
-                        dload_url = urllib.quote(dload_url, '')
-
-            result = {
-                'orderid': scene.order.orderid,
-                'product_type': scene.sensor_type,
-                'scene': scene.name,
-                'priority': scene.order.priority,
-                'options': json.loads(scene.order.product_options)
-            }
+            if 'download_url' in urls[scene.name]:
+                dload_url = urls[scene.name]['download_url']
+                if encode_urls:
+                    dload_url = urllib.quote(dload_url, '')
 
-            if scene.sensor_type == 'plot':
-                results.append(result)
-            elif dload_url is not None:
-                result['download_url'] = dload_url
-                results.append(result)
-            else:
-                print("dload_url for %s:%s was None, skipping..."
-                      % (scene.order.id, scene.name))
+        elif scene.sensor_type == 'modis':
+            if 'download_url' in modis_urls[scene.name]:
+                dload_url = modis_urls[scene.name]['download_url']
+
+                if encode_urls:
+                    dload_url = urllib.quote(dload_url, '')
+
+        result = {
+            'orderid': scene.order.orderid,
+            'product_type': scene.sensor_type,
+            'scene': scene.name,
+            'priority': scene.order.priority,
+            'options': json.loads(scene.order.product_options)
+        }
+
+        if scene.sensor_type == 'plot':
+            results.append(result)
+        elif dload_url is not None:
+            result['download_url'] = dload_url
+            results.append(result)
+        else:
+            print("dload_url for %s:%s was None, skipping..."
+                  % (scene.order.id, scene.name))
 
     return results
 
@@ -614,6 +715,58 @@ def update_status(name, orderid, processing_loc, status):
     return True
 
 
+@transaction.atomic
+def update_statuses(status_list):
+    ''' Allows the caller to update the status of many products at once
+
+    Keyword args:
+    status_list - A list of (name, orderid, processing_loc, status) tuples
+
+    Returns:
+    A list of the (name, orderid) tuples which matched no product, empty
+    when every product was updated
+    '''
+
+    if not isinstance(status_list, list):
+        raise TypeError("update_statuses expects a list of tuples(name, "
+                        "orderid, processing_loc, status)")
+
+    # products sharing an order, location and status are updated together
+    updates = {}
+
+    for name, orderid, processing_loc, status in status_list:
+        key = (orderid, processing_loc, status)
+        if not key in updates:
+            updates[key] = list()
+        updates[key].append(name)
+
+    missing = list()
+
+    for (orderid, processing_loc, status), names in updates.iteritems():
+
+        names = set(names)
+
+        filter_args = {'name__in': names, 'order__orderid': orderid}
+
+        update_args = {'status': status,
+                       'processing_location': processing_loc,
+                       'log_file_contents': ''}
+
+        updated = Scene.objects.filter(**filter_args).update(**update_args)
+
+        # only look for the missing products when something didn't match
+        if updated < len(names):
+            found = Scene.objects.filter(**filter_args)
+            found = set(found.values_list('name', flat=True))
+
+            for name in names - found:
+                print("update_statuses: scene:%s not found for order:%s"
+                      % (name, orderid))
+                missing.append((name, orderid))
+
+    return missing
+
+
 @transaction.atomic
 #  Marks a scene in error and accepts the log file contents
 def set_product_error(name, orderid, processing_loc, error):
@@ -700,7 +853,11 @@ def queue_products(order_name_tuple_list, processing_location, job_name):
     return True
 
 
-@transaction.atomic
+def status_feed_cache_key(email):
+    '''Key for the cached latest completion date of an email's status feed'''
+    return 'status_feed_modified_%s' % hashlib.md5(email.lower()).hexdigest()
+
+
 #  Marks a scene complete in the database for a given order
 def mark_product_complete(name,
                           orderid,
@@ -710,38 +867,138 @@ def mark_product_complete(name,
                           log_file_contents=""):
 
     print ("Marking scene:%s complete for order:%s" % (name, orderid))
-    product = Scene.objects.get(name=name, order__orderid=orderid)
 
-    product.status = 'complete'
-    product.processing_location = processing_loc
-    product.product_distro_location = completed_file_location
-    product.completion_date = datetime.datetime.now()
-    product.cksum_distro_location = destination_cksum_file
-    product.log_file_contents = log_file_contents
-    product.note = None
+    with transaction.atomic():
+        product = Scene.objects.get(name=name, order__orderid=orderid)
 
-    base_url = Configuration().getValue('distribution.cache.home.url')
+        product.status = 'complete'
+        product.processing_location = processing_loc
+        product.product_distro_location = completed_file_location
+        product.completion_date = datetime.datetime.now()
+        product.cksum_distro_location = destination_cksum_file
+        product.log_file_contents = log_file_contents
+        product.note = None
 
-    product_file_parts = completed_file_location.split('/')
-    product_file = product_file_parts[len(product_file_parts) - 1]
-    cksum_file_parts = destination_cksum_file.split('/')
-    cksum_file = cksum_file_parts[len(cksum_file_parts) - 1]
+        base_url = Configuration().getValue('distribution.cache.home.url')
 
-    product.product_dload_url = ('%s/orders/%s/%s') % \
-                                (base_url, orderid, product_file)
+        product_file_parts = completed_file_location.split('/')
+        product_file = product_file_parts[len(product_file_parts) - 1]
+        cksum_file_parts = destination_cksum_file.split('/')
+        cksum_file = cksum_file_parts[len(cksum_file_parts) - 1]
 
-    product.cksum_download_url = ('%s/orders/%s/%s') % \
-                                 (base_url, orderid, cksum_file)
+        product.product_dload_url = ('%s/orders/%s/%s') % \
+                                    (base_url, orderid, product_file)
 
-    product.save()
+        product.cksum_download_url = ('%s/orders/%s/%s') % \
+                                     (base_url, orderid, cksum_file)
+
+        product.save()
+
+        if product.order.order_source == 'ee':
+            #update ee
+            lta.update_order_status(product.order.ee_order_id,
+                                    product.ee_unit_id, 'C')
+
+    # the user's status feed has changed, cleared once committed so a feed
+    # request can't cache the previous completion date again
+    cache.delete(status_feed_cache_key(product.order.user.email))
 
     if product.order.order_source == 'ee':
-        #update ee
-        lta.update_order_status(product.order.ee_order_id,
-                                product.ee_unit_id, 'C')
         return True
 
 
+def mark_products_complete(complete_list):
+    ''' Allows the caller to mark many products complete at once
+
+    Keyword args:
+    complete_list - A list of (name, orderid, processing_loc,
+                    completed_file_location, destination_cksum_file,
+                    log_file_contents) tuples
+
+    Returns:
+    A list of the (name, orderid) tuples which matched no product, empty
+    when every product was marked complete
+    '''
+
+    if not isinstance(complete_list, list):
+        raise TypeError("mark_products_complete expects a list of tuples"
+                        "(name, orderid, processing_loc, "
+                        "completed_file_location, destination_cksum_file, "
+                        "log_file_contents)")
+
+    base_url = Configuration().getValue('distribution.cache.home.url')
+
+    completion_date = datetime.datetime.now()
+
+    def download_url(orderid, file_location):
+        file_name = file_location.split('/')[-1]
+        return ('%s/orders/%s/%s') % (base_url, orderid, file_name)
+
+    missing = list()
+
+    with transaction.atomic():
+        for (name, orderid, processing_loc, completed_file_location,
+             destination_cksum_file, log_file_contents) in complete_list:
+
+            print ("Marking scene:%s complete for order:%s" % (name, orderid))
+
+            filter_args = {'name': name, 'order__orderid': orderid}
+
+            update_args = {
+                'status': 'complete',
+                'processing_location': processing_loc,
+                'product_distro_location': completed_file_location,
+                'completion_date': completion_date,
+                'cksum_distro_location': destination_cksum_file,
+                'log_file_contents': log_file_contents,
+                'note': None,
+                'product_dload_url': download_url(orderid,
+                                                  completed_file_location),
+                'cksum_download_url': download_url(orderid,
+                                                   destination_cksum_file)
+            }
+
+            updated = Scene.objects.filter(**filter_args).update(**update_args)
+
+            if updated == 0:
+                print("mark_products_complete: scene:%s not found for order:%s"
+                      % (name, orderid))
+                missing.append((name, orderid))
+
+    # find the owners and ee units of everything just completed
+    names = set([c[0] for c in complete_list])
+    orderids = set([c[1] for c in complete_list])
+
+    filter_args = {'name__in': names, 'order__orderid__in': orderids}
+
+    products = Scene.objects.filter(**filter_args)
+    products = products.values_list('name', 'order__orderid',
+                                    'order__user__email',
+                                    'order__order_source',
+                                    'order__ee_order_id', 'ee_unit_id')
+
+    completed = set([(c[0], c[1]) for c in complete_list])
+
+    # the users' status feeds have changed
+    feed_emails = set()
+
+    for (name, orderid, email, order_source, ee_order_id, ee_unit_id) \
+            in products:
+
+        if not (name, orderid) in completed:
+            continue
+
+        feed_emails.add(email)
+
+        if order_source == 'ee':
+            #update ee
+            lta.update_order_status(ee_order_id, ee_unit_id, 'C')
+
+    cache.delete_many([status_feed_cache_key(e) for e in feed_emails])
+
+    return missing
+
+
 @transaction.atomic
 def update_order_if_complete(order):
     '''Method to send out the order completion email
@@ -790,147 +1047,142 @@ def update_order_if_complete(order):
                 raise Exception(msg)
 
 
-@transaction.atomic
-def load_ee_orders():
-    ''' Loads all the available orders from lta into
-    our database and updates their status
-    '''
-
-    #check to make sure this operation is enabled.  Bail if not
-    enabled = Configuration().getValue("load_ee_orders_enabled")
-    if enabled.lower() != 'true':
-        helper_logger(("enable_load_ee_orders is disabled,"
-                       "skipping load_ee_orders()"))
-        return
+def get_ee_user(username, email_addr, contactid):
+    '''Retrieves the user for an EE order, creating the user and their
+    profile if they don't exist yet and keeping the email address current'''
 
-    # This returns a dict that contains a list of dicts{}
-    # key:(order_num, email, contactid) = list({sceneid:, unit_num:})
-    orders = lta.get_available_orders()
+    # now look the user up in our db.  Create if it doesn't exist
+    try:
+        user = User.objects.get(username=username)
 
-    # use this to cache calls to EE Registration Service username lookups
-    local_cache = {}
+        # make sure the email we have on file is current
+        if not user.email or user.email != email_addr:
+            user.email = email_addr
+            user.save()
 
-    # Capture in our db
-    for eeorder, email_addr, contactid in orders:
-
-        # create the orderid based on the info from the eeorder
-        order_id = Order.generate_ee_order_id(email_addr, eeorder)
-
-        # paranoia... initialize this to None since it's used in the loop.
-        order = None
-
-        # go look to see if it already exists in the db
+        #try to retrieve the userprofile.  if it doesn't exist create
         try:
-            order = Order.objects.get(orderid=order_id)
-        except Order.DoesNotExist:
+            user.userprofile
+        except UserProfile.DoesNotExist:
+            UserProfile(contactid=contactid, user=user).save()
 
-            # retrieve the username from the EE registration service
-            # cache this call
-            if contactid in local_cache:
-                username = local_cache[contactid]
-            else:
-                username = lta.get_user_name(contactid)
-                local_cache[contactid] = username
+    except User.DoesNotExist:
+        # Create a new user. Note that we can set password
+        # to anything, because it won't be checked; the password
+        # from RegistrationServiceClient will.
+        user = User(username=username, password='this isnt used')
+        user.is_staff = False
+        user.is_superuser = False
+        user.email = email_addr
+        user.save()
 
-            # now look the user up in our db.  Create if it doesn't exist
-            # we'll want to put some caching in place here too
-            try:
-                user = User.objects.get(username=username)
+        UserProfile(contactid=contactid, user=user).save()
 
-                # make sure the email we have on file is current
-                if not user.email or user.email is not email_addr:
-                    user.email = email_addr
-                    user.save()
+    return user
 
-                #try to retrieve the userprofile.  if it doesn't exist create
-                try:
-                    user.userprofile
-                except UserProfile.DoesNotExist:
-                    UserProfile(contactid=contactid, user=user).save()
-
-            except User.DoesNotExist:
-                # Create a new user. Note that we can set password
-                # to anything, because it won't be checked; the password
-                # from RegistrationServiceClient will.
-                user = User(username=username, password='this isnt used')
-                user.is_staff = False
-                user.is_superuser = False
-                user.email = email_addr
-                user.save()
-
-                UserProfile(contactid=contactid, user=user).save()
-
-            # We have a user now.  Now build the new Order since it
-            # wasn't found.
-            # TODO: This code should be housed in the models module.
-            # TODO: This logic should not be visible at this level.
-            order = Order()
-            order.orderid = order_id
-            order.user = user
-            order.order_type = 'level2_ondemand'
-            order.status = 'ordered'
-            order.note = 'EarthExplorer order id: %s' % eeorder
-            order.product_options = json.dumps(Order.get_default_ee_options(),
-                                               sort_keys=True,
-                                               indent=4)
-            order.ee_order_id = eeorder
-            order.order_source = 'ee'
-            order.order_date = datetime.datetime.now()
-            order.priority = 'normal'
-            order.save()
-
-        for s in orders[eeorder, email_addr, contactid]:
-            #go look for the scene by ee_unit_id.  This will stop
-            #duplicate key update collisions
-
-            scene = None
-            try:
-                scene = Scene.objects.get(order=order,
-                                          ee_unit_id=s['unit_num'])
 
-                if scene.status == 'complete':
+def load_ee_order_chunk(orders, local_cache):
+    '''Captures a chunk of the orders from lta in our database using set
+    queries and bulk inserts
 
-                    success, msg, status =\
-                        lta.update_order_status(eeorder, s['unit_num'], "C")
-
-                    if not success:
-                        log_msg = ("Error updating lta for "
-                                   "[eeorder:%s ee_unit_num:%s "
-                                   "scene name:%s order:%s")
-                        log_msg = log_msg % (eeorder, s['unit_num'],
-                                             scene.name, order.orderid)
-
-                        helper_logger(log_msg)
+    Keyword args:
+    orders - A dict of (order_num, email, contactid):list of units, as
+             returned by lta.get_available_orders()
+    local_cache - A dict caching EE Registration Service username lookups
 
-                        log_msg = ("Error detail: lta return message:%s "
-                                   "lta return status code:%s")
-                        log_msg = log_msg % (msg, status)
+    Returns:
+    A list of (eeorder, unit_num, status, scene name, orderid) tuples for
+    the LTA unit status updates that are needed
+    '''
 
-                        helper_logger(log_msg)
+    # create the orderids based on the info from the eeorders
+    order_ids = {}
+    for eeorder, email_addr, contactid in orders:
+        order_ids[eeorder, email_addr, contactid] = \
+            Order.generate_ee_order_id(email_addr, eeorder)
 
-                elif scene.status == 'unavailable':
-                    success, msg, status =\
-                        lta.update_order_status(eeorder, s['unit_num'], "R")
+    # go look to see which already exist in the db
+    existing = Order.objects.filter(orderid__in=order_ids.values())
+    existing = dict((o.orderid, o) for o in existing)
 
-                    if not success:
-                        log_msg = ("Error updating lta for "
-                                   "[eeorder:%s ee_unit_num:%s "
-                                   "scene name:%s order:%s")
-                        log_msg = log_msg % (eeorder, s['unit_num'],
-                                             scene.name, order.orderid)
+    new_orders = list()
 
-                        helper_logger(log_msg)
+    for (eeorder, email_addr, contactid), order_id in order_ids.iteritems():
 
-                        log_msg = ("Error detail: "
-                                   "lta return message:%s  lta return "
-                                   "status code:%s") % (msg, status)
+        if order_id in existing:
+            continue
 
-                        helper_logger(log_msg)
-            except Scene.DoesNotExist:
-                # TODO: This code should be housed in the models module.
-                # TODO: This logic should not be visible at this level.
-                scene = Scene()
+        # retrieve the username from the EE registration service
+        # cache this call
+        if contactid in local_cache:
+            username = local_cache[contactid]
+        else:
+            username = lta.get_user_name(contactid)
+            local_cache[contactid] = username
+
+        user = get_ee_user(username, email_addr, contactid)
+
+        # We have a user now.  Now build the new Order since it
+        # wasn't found.
+        # TODO: This code should be housed in the models module.
+        # TODO: This logic should not be visible at this level.
+        order = Order()
+        order.orderid = order_id
+        order.user = user
+        order.order_type = 'level2_ondemand'
+        order.status = 'ordered'
+        order.note = 'EarthExplorer order id: %s' % eeorder
+        order.product_options = json.dumps(Order.get_default_ee_options(),
+                                           sort_keys=True,
+                                           indent=4)
+        order.ee_order_id = eeorder
+        order.order_source = 'ee'
+        order.order_date = datetime.datetime.now()
+        order.priority = 'normal'
+        new_orders.append(order)
+
+    if len(new_orders) > 0:
+        Order.objects.bulk_create(new_orders)
+
+        # bulk_create doesn't set the ids, retrieve them
+        created = [o.orderid for o in new_orders]
+        for order in Order.objects.filter(orderid__in=created):
+            existing[order.orderid] = order
+
+    # find all the scenes already captured for these orders.  Scenes are
+    # matched by ee_unit_id, which will stop duplicate key update collisions
+    filter_args = {'order__in': existing.values()}
+
+    scenes = Scene.objects.filter(**filter_args)
+    scenes = scenes.values_list('order_id', 'ee_unit_id', 'status', 'name')
+    scenes = dict(((s[0], s[1]), (s[2], s[3])) for s in scenes)
+
+    new_scenes = list()
+    lta_updates = list()
+
+    for (eeorder, email_addr, contactid), units in orders.iteritems():
+
+        order = existing[order_ids[eeorder, email_addr, contactid]]
+
+        for s in units:
+
+            key = (order.id, s['unit_num'])
+
+            if key in scenes:
+                (status, name) = scenes[key]
+
+                # report products that are already done, anything else
+                # is still in process
+                if status == 'complete':
+                    lta_updates.append((eeorder, s['unit_num'], 'C', name,
+                                        order.orderid))
+                    continue
+                elif status == 'unavailable':
+                    lta_updates.append((eeorder, s['unit_num'], 'R', name,
+                                        order.orderid))
+                    continue
 
+            else:
                 product = None
                 try:
                     product = espa_common.sensor.instance(s['sceneid'])
@@ -947,32 +1199,90 @@ def load_ee_orders():
                 elif isinstance(product, espa_common.sensor.Modis):
                     sensor_type = 'modis'
 
+                # TODO: This code should be housed in the models module.
+                # TODO: This logic should not be visible at this level.
+                scene = Scene()
                 scene.sensor_type = sensor_type
                 scene.name = product.product_id
                 scene.ee_unit_id = s['unit_num']
                 scene.order = order
                 scene.order_date = datetime.datetime.now()
                 scene.status = 'submitted'
-                scene.save()
+                new_scenes.append(scene)
+
+                name = scene.name
+                scenes[key] = (scene.status, name)
+
+            lta_updates.append((eeorder, s['unit_num'], 'I', name,
+                                order.orderid))
+
+    batch_size = espa_common.settings.BULK_CREATE_BATCH_SIZE
+    Scene.objects.bulk_create(new_scenes, batch_size=batch_size)
+
+    return lta_updates
+
+
+def update_ee_unit_statuses(lta_updates):
+    '''Sends the unit status updates to lta concurrently and logs any that
+    fail
+
+    Keyword args:
+    lta_updates - A list of (eeorder, unit_num, status, scene name, orderid)
+    '''
+
+    results = lta.update_order_statuses([u[0:3] for u in lta_updates])
+
+    for (eeorder, unit_num, status, name, orderid), result \
+            in zip(lta_updates, results):
+
+        (success, msg, return_status) = result
+
+        if not success:
+            log_msg = ("Error updating lta for "
+                       "[eeorder:%s ee_unit_num:%s "
+                       "scene name:%s order:%s] to status:%s")
+            log_msg = log_msg % (eeorder, unit_num, name, orderid, status)
+
+            helper_logger(log_msg)
+
+            log_msg = ("Error detail: lta return message:%s "
+                       "lta return status code:%s")
+            log_msg = log_msg % (msg, return_status)
+
+            helper_logger(log_msg)
+
+
+def load_ee_orders():
+    ''' Loads all the available orders from lta into
+    our database and updates their status
+    '''
 
-            # Update LTA
-            success, msg, status =\
-                lta.update_order_status(eeorder, s['unit_num'], "I")
+    #check to make sure this operation is enabled.  Bail if not
+    enabled = Configuration().getValue("load_ee_orders_enabled")
+    if enabled.lower() != 'true':
+        helper_logger(("enable_load_ee_orders is disabled,"
+                       "skipping load_ee_orders()"))
+        return
 
-            if not success:
-                log_msg = ("Error updating lta for "
-                           "[eeorder:%s ee_unit_num:%s scene "
-                           "name:%s order:%simport re") % (eeorder,
-                                                           s['unit_num'],
-                                                           scene.name,
-                                                           order.orderid)
+    # This returns a dict that contains a list of dicts{}
+    # key:(order_num, email, contactid) = list({sceneid:, unit_num:})
+    orders = lta.get_available_orders()
 
-                helper_logger(log_msg)
+    # use this to cache calls to EE Registration Service username lookups
+    local_cache = {}
+
+    # Capture in our db a chunk at a time so locks are not held for the
+    # whole load, updating lta once each chunk is committed
+    keys = orders.keys()
+    chunk_size = espa_common.settings.EE_ORDER_CHUNK_SIZE
 
-                log_msg = ("Error detail: lta return message:%s  "
-                           "lta return status code:%s") % (msg, status)
+    for index in xrange(0, len(keys), chunk_size):
+        chunk = dict((k, orders[k]) for k in keys[index:index + chunk_size])
 
-                helper_logger(log_msg)
+        with transaction.atomic():
+            lta_updates = load_ee_order_chunk(chunk, local_cache)
+
+        update_ee_unit_statuses(lta_updates)
 
 
     # Sends the order submission confirmation email
@@ -993,8 +1303,23 @@ def finalize_orders():
     '''Checks all open orders in the system and marks them complete if all
     required scene processing is done'''
 
-    orders = Order.objects.filter(status='ordered')
-    for o in orders:
+    complete_scene_status = ['complete', 'unavailable']
+
+    # find the open orders still waiting on a product in one query, rather
+    # than checking the products of every open order
+    filter_args = {'order__status': 'ordered'}
+
+    outstanding = Scene.objects.filter(**filter_args)
+    outstanding = outstanding.exclude(status__in=complete_scene_status)
+    outstanding = outstanding.values_list('order_id', flat=True).distinct()
+    outstanding = set(outstanding)
+
+    open_orders = Order.objects.filter(status='ordered')
+    open_orders = open_orders.values_list('id', flat=True)
+
+    finished = [o for o in open_orders if not o in outstanding]
+
+    for o in Order.objects.filter(id__in=finished):
         update_order_if_complete(o)
 
     return True
@@ -1002,10 +1327,19 @@ def finalize_orders():
 
 def handle_orders():
     '''Logic handler for how we accept orders + products into the system'''
+
+    # the metrics cover the whole web process, only report this pass
+    lta_latency = lta.get_latency_snapshot()
+
     send_initial_emails()
     handle_onorder_landsat_products()
     handle_retry_products()
     load_ee_orders()
     handle_submitted_products()
     finalize_orders()
+
+    # calls made by web requests during the pass are included
+    print("LTA latency this pass:\n%s"
+          % lta.get_latency_report(since=lta_latency))
+
     return True
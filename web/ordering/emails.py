@@ -1,20 +1,89 @@
 import models
 from models import Order
+from models import Scene
 from models import Configuration
-from django.db import transaction
 import datetime
 
 import re
 from email.mime.text import MIMEText
 from smtplib import SMTP
+from smtplib import SMTPServerDisconnected
 
 from espa_common import settings
 
 
+class MailQueue(object):
+    '''Delivers messages over one mail server connection, which is opened on
+    first use and reopened when the server drops it or after
+    settings.ESPA_EMAIL_MESSAGES_PER_CONNECTION messages.  Call close() when
+    done, or use it in a with statement.'''
+
+    def __init__(self, host=None, timeout=None):
+        if host is None:
+            host = settings.ESPA_EMAIL_SERVER
+        if timeout is None:
+            timeout = settings.ESPA_EMAIL_TIMEOUT
+
+        self.host = host
+        self.timeout = timeout
+        self.connection = None
+        self.connection_count = 0
+        self.sent_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def connect(self):
+        self.close()
+        self.connection = SMTP(host=self.host, timeout=self.timeout)
+        self.connection_count = 0
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.quit()
+            except Exception:
+                # the server already dropped us, nothing left to clean up
+                self.connection.close()
+            self.connection = None
+
+    def send(self, sender, recipients, message):
+        '''Delivers a message, reconnecting once if the connection was lost
+
+        Keyword args:
+        sender -- The envelope from address
+        recipients -- An address or list of addresses
+        message -- The complete message as a string
+        '''
+
+        per_connection = settings.ESPA_EMAIL_MESSAGES_PER_CONNECTION
+
+        if (self.connection is None or
+                self.connection_count >= per_connection):
+            self.connect()
+
+        try:
+            self.connection.sendmail(sender, recipients, message)
+        except SMTPServerDisconnected:
+            self.connect()
+            self.connection.sendmail(sender, recipients, message)
+
+        self.connection_count += 1
+        self.sent_count += 1
+
+
 class Emails(object):
 
-    def __init__(self):
+    def __init__(self, mail_queue=None):
+        '''Keyword args:
+        mail_queue -- A MailQueue to deliver messages with.  Each message is
+                      sent over a new connection if not supplied
+        '''
         self.status_base_url = Configuration().getValue('espa.status.url')
+        self.mail_queue = mail_queue
 
     def __send(self, recipient, subject, body):
         #return espa_common.utilities.send_email(recipient=recipient,
@@ -49,9 +118,14 @@ class Emails(object):
         msg['Subject'] = subject
         msg['To'] = to_header
         msg['From'] = settings.ESPA_EMAIL_ADDRESS
-        s = SMTP(host=settings.ESPA_EMAIL_SERVER)
-        s.sendmail(settings.ESPA_EMAIL_ADDRESS, recipient, msg.as_string())
-        s.quit()
+
+        if self.mail_queue is not None:
+            self.mail_queue.send(settings.ESPA_EMAIL_ADDRESS, recipient,
+                                 msg.as_string())
+        else:
+            with MailQueue() as mail_queue:
+                mail_queue.send(settings.ESPA_EMAIL_ADDRESS, recipient,
+                                msg.as_string())
 
         return True
 
@@ -94,19 +168,59 @@ class Emails(object):
                            subject=subject,
                            body=email_msg)
 
-    @transaction.atomic
     def send_all_initial(self):
         '''Finds all the orders that have not had their initial emails sent and
-        sends them'''
+        sends them over a single mail server connection.  Orders whose email
+        could not be sent are left to be retried on the next run.'''
+
+        orders = Order.objects.filter(status='ordered',
+                                      initial_email_sent__isnull=True)
+        orders = list(orders.select_related('user'))
+
+        if len(orders) == 0:
+            return
+
+        # retrieve the products of every order at once
+        products = dict()
+
+        scenes = Scene.objects.filter(order__in=[o.id for o in orders])
+        scenes = scenes.order_by('id').values_list('order_id', 'name')
+
+        for order_id, name in scenes.iterator():
+            products.setdefault(order_id, list()).append(name)
 
-        orders = Order.objects.filter(status='ordered')
-        for o in orders:
-            if not o.initial_email_sent:
-                self.send_initial(o)
-                o.initial_email_sent = datetime.datetime.now()
-                o.save()
+        sent = list()
 
-    def send_initial(self, order):
+        owns_queue = self.mail_queue is None
+        if owns_queue:
+            self.mail_queue = MailQueue()
+
+        try:
+            for o in orders:
+                try:
+                    self.send_initial(o, products.get(o.id, list()))
+                    sent.append(o.id)
+                except Exception, e:
+                    print("Could not send initial email for %s: %s"
+                          % (o.orderid, e))
+        finally:
+            if owns_queue:
+                self.mail_queue.close()
+                self.mail_queue = None
+
+            # record what was sent even if delivery was interrupted
+            if len(sent) > 0:
+                Order.objects.filter(id__in=sent).update(
+                    initial_email_sent=datetime.datetime.now())
+
+    def send_initial(self, order, product_names=None):
+        '''Sends the order received email
+
+        Keyword args:
+        order -- The order id, database id or models.Order
+        product_names -- The names of the order's products, retrieved from
+                         the database if not supplied
+        '''
 
         if isinstance(order, str):
             order = Order.objects.get(orderid=order)
@@ -132,11 +246,10 @@ class Emails(object):
 
         #scenes = Scene.objects.filter(order__id=order.id)
 
-        products = order.scene_set.all()
-
-        for product in products:
-            name = product.name
+        if product_names is None:
+            product_names = order.scene_set.values_list('name', flat=True)
 
+        for name in product_names:
             if name == 'plot':
                 name = "Plotting & Statistics"
             m.append("%s\n" % name)
@@ -1,31 +1,139 @@
 from espa_common import settings
 from espa_common import sensor
 from espa_common import utilities
+from multiprocessing.pool import ThreadPool
 import requests
+import threading
+import urlparse
+import time
 import os
 
 
+class HostRateLimiter(object):
+    '''Spaces out requests so no more than rate requests per second are
+    sent to any single host.  Safe to share between threads.'''
+
+    def __init__(self, rate):
+        self.interval = 0.0
+
+        if rate:
+            self.interval = 1.0 / rate
+
+        self.lock = threading.Lock()
+        self.next_request = {}
+
+    def wait(self, url):
+        '''Blocks until a request may be sent to the host in url'''
+
+        if not self.interval:
+            return
+
+        host = urlparse.urlparse(url).netloc
+
+        with self.lock:
+            now = time.time()
+            scheduled = max(now, self.next_request.get(host, now))
+            self.next_request[host] = scheduled + self.interval
+
+        if scheduled > now:
+            time.sleep(scheduled - now)
+
+
 class LPDAACService(object):
 
     def __init__(self):
         self.host = settings.MODIS_INPUT_CHECK_HOST
         self.port = settings.MODIS_INPUT_CHECK_PORT
 
-    def verify_products(self, products):
+    def verify_products(self, products, workers=None):
+        '''Determines if LPDAAC products are available for download.  The
+        checks are issued concurrently over a single keep-alive session and
+        rate limited per host.
+
+        Keyword args:
+        products - A product name or a list of product names/sensor.Modis
+        workers - The maximum number of concurrent checks.  Defaults to
+                  settings.MODIS_INPUT_CHECK_WORKERS
+
+        Returns:
+        A dict of product_id:True/False
+        '''
+
         response = {}
+        urls = {}
 
-        if isinstance(products, str):
+        if isinstance(products, basestring):
             products = [products]
 
         for product in products:
 
-            if isinstance(product, str):
-                product = sensor.instance(product)
+            try:
+                if isinstance(product, basestring):
+                    product = sensor.instance(product)
+
+                url = self.get_download_url(product)
+            except sensor.ProductNotImplemented:
+                print('%s is not an implemented LPDAAC product' % product)
+                response[product] = False
+                continue
+
+            if 'download_url' in url.get(product.product_id, {}):
+                urls[product.product_id] = \
+                    url[product.product_id]['download_url']
+            else:
+                response[product.product_id] = False
+
+        if len(urls) == 0:
+            return response
+
+        if workers is None:
+            workers = settings.MODIS_INPUT_CHECK_WORKERS
+        workers = max(1, min(int(workers), len(urls)))
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                                pool_maxsize=workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
 
-            response[product.product_id] = self.input_exists(product)
+        limiter = HostRateLimiter(settings.MODIS_INPUT_CHECK_RATE)
+
+        pool = ThreadPool(workers)
+        try:
+            results = list()
+            for product_id, url in urls.iteritems():
+                result = pool.apply_async(self._url_exists,
+                                          (session, limiter, url))
+                results.append((product_id, result))
+            pool.close()
+
+            for product_id, result in results:
+                response[product_id] = result.get()
+        finally:
+            pool.terminate()
+            pool.join()
+            session.close()
 
         return response
 
+    def _url_exists(self, session, limiter, url):
+        '''Issues a HEAD request for url on the shared session'''
+
+        limiter.wait(url)
+
+        response = None
+
+        try:
+            response = session.head(url,
+                                    timeout=settings.MODIS_INPUT_CHECK_TIMEOUT)
+            return response.ok
+        except Exception, e:
+            print ("Exception checking inputs:%s" % e)
+            return False
+        finally:
+            if response is not None:
+                response.close()
+
     def input_exists(self, product):
         '''Determines if a LPDAAC product is available for download
 
@@ -51,7 +159,8 @@ class LPDAACService(object):
                 response = None
 
                 try:
-                    response = requests.head(url)
+                    response = requests.head(
+                        url, timeout=settings.MODIS_INPUT_CHECK_TIMEOUT)
                     if response.ok:
                         result = True
                 except Exception, e:
@@ -140,8 +249,8 @@ def input_exists(product):
     return LPDAACService().input_exists(product)
 
 
-def verify_products(products):
-    return LPDAACService().verify_products(products)
+def verify_products(products, workers=None):
+    return LPDAACService().verify_products(products, workers)
 
 def get_download_url(product):
     return LPDAACService().get_download_url(product)
@@ -2,10 +2,18 @@ from cStringIO import StringIO
 from django.conf import settings
 from suds.client import Client as SoapClient
 from suds.cache import ObjectCache
+from suds.transport import Reply
+from suds.transport import Transport
+from suds.transport import TransportError
 from espa_common import sensor
 from espa_common import settings as common_settings
 
+from multiprocessing.pool import ThreadPool
+import copy
+import time
 import requests
+import threading
+import functools
 import collections
 import xml.etree.ElementTree as xml
 
@@ -17,13 +25,34 @@ class LTAService(object):
 
     service_name = None
 
-    def __init__(self):
+    def __init__(self, session=None, timeout=None):
+        '''Keyword args:
+        session A requests session to send requests over.  Defaults to the
+                process wide pooled session
+        timeout Seconds to wait on a response.  Defaults to the service's
+                entry in settings.LTA_SERVICE_TIMEOUTS or settings.LTA_TIMEOUT
+        '''
+
         self.xml_header = "<?xml version ='1.0' encoding='UTF-8' ?>"
         self.url = self.get_url(self.service_name)
 
+        if session is None:
+            session = get_session()
+
+        if timeout is None:
+            timeout = common_settings.LTA_SERVICE_TIMEOUTS.get(
+                self.service_name, common_settings.LTA_TIMEOUT)
+
+        self.session = session
+        self.timeout = timeout
+
     def __repr__(self):
         return "LTAService:%s" % self.__dict__
 
+    def clone(self):
+        ''' Returns a copy of this client for use by another thread '''
+        return copy.copy(self)
+
     def get_url(self, service_name):
         ''' Service locator pattern.  Retrieves proper url from settings.py
         based on the environment
@@ -38,12 +67,202 @@ class LTAService(object):
         return settings.URL_FOR(service_name)
 
 
+def build_session(pool_size):
+    ''' Builds a requests session which keeps up to pool_size connections
+    to a host alive for reuse
+
+    Keyword args:
+    pool_size The maximum number of concurrent connections to a host
+
+    Returns:
+    A requests.Session
+    '''
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                            pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    return session
+
+
+class LatencyMetrics(object):
+    ''' Thread safe count, total and maximum latency of each operation '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.operations = dict()
+
+    def record(self, operation, elapsed, failed=False):
+        with self.lock:
+            stats = self.operations.get(operation)
+
+            if stats is None:
+                stats = {'calls': 0, 'errors': 0, 'total': 0.0, 'max': 0.0}
+                self.operations[operation] = stats
+
+            stats['calls'] += 1
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+
+            if failed:
+                stats['errors'] += 1
+
+    def get(self):
+        ''' Returns a copy of the statistics keyed by operation '''
+
+        with self.lock:
+            return dict((operation, dict(stats))
+                        for operation, stats in self.operations.iteritems())
+
+    def reset(self):
+        with self.lock:
+            self.operations = dict()
+
+    def report(self, since=None):
+        ''' Describes the statistics, one operation per line
+
+        Keyword args:
+        since A snapshot from get().  Only the calls made after it are
+              described, without the maximum since it can't be separated
+              from the earlier calls
+        '''
+
+        lines = list()
+
+        for operation, stats in sorted(self.get().iteritems()):
+            if since is not None:
+                before = since.get(operation)
+
+                if before is not None:
+                    stats['calls'] -= before['calls']
+                    stats['errors'] -= before['errors']
+                    stats['total'] -= before['total']
+
+                if stats['calls'] == 0:
+                    continue
+
+                lines.append("%s calls:%d errors:%d mean:%.3fs"
+                             % (operation, stats['calls'], stats['errors'],
+                                stats['total'] / stats['calls']))
+            else:
+                lines.append("%s calls:%d errors:%d mean:%.3fs max:%.3fs"
+                             % (operation, stats['calls'], stats['errors'],
+                                stats['total'] / stats['calls'],
+                                stats['max']))
+
+        return '\n'.join(lines)
+
+
+metrics = LatencyMetrics()
+
+
+def timed(method):
+    ''' Records the latency of a client method in the module metrics '''
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        operation = '%s.%s' % (self.__class__.__name__, method.__name__)
+        failed = True
+
+        start = time.time()
+        try:
+            result = method(self, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            metrics.record(operation, time.time() - start, failed)
+
+    return wrapper
+
+
+class EscapedResponseReader(object):
+    ''' File like reader over a streamed response which escapes the bare
+    ampersands LTA returns and drops newlines, so the body can be parsed
+    incrementally '''
+
+    def __init__(self, response, block_size=65536):
+        self.blocks = response.iter_content(block_size)
+        self.buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            try:
+                block = next(self.blocks)
+            except StopIteration:
+                break
+
+            self.buffer += block.replace('&', '&amp;').replace('\n', '')
+
+        if size < 0:
+            size = len(self.buffer)
+
+        data = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+
+        return data
+
+
+class SoapRequestsTransport(Transport):
+    ''' Sends SOAP requests over a requests session so connections are kept
+    alive and pooled between calls '''
+
+    def __init__(self, session, timeout):
+        Transport.__init__(self)
+        self.session = session
+        self.timeout = timeout
+
+    def __deepcopy__(self, memo={}):
+        # cloned suds clients copy their transport, share the session
+        return SoapRequestsTransport(self.session, self.timeout)
+
+    def open(self, request):
+        response = self.session.get(request.url, timeout=self.timeout)
+        if not response.ok:
+            raise TransportError(response.reason, response.status_code,
+                                 StringIO(response.content))
+
+        return StringIO(response.content)
+
+    def send(self, request):
+        response = self.session.post(request.url,
+                                     data=request.message,
+                                     headers=request.headers,
+                                     timeout=self.timeout)
+
+        # mirror the suds http transport, which has no reply for these
+        if response.status_code in (202, 204):
+            return None
+
+        if not response.ok:
+            raise TransportError(response.reason, response.status_code,
+                                 StringIO(response.content))
+
+        return Reply(response.status_code, response.headers,
+                     response.content)
+
+
 class LTASoapService(LTAService):
     ''' Abstract service class for SOAP based clients '''
 
     def __init__(self, *args, **kwargs):
         super(LTASoapService, self).__init__(*args, **kwargs)
-        self.client = SoapClient(self.url, cache=self.build_object_cache())
+
+        transport = SoapRequestsTransport(self.session, self.timeout)
+
+        self.client = SoapClient(self.url,
+                                 cache=self.build_object_cache(),
+                                 transport=transport)
+
+    def clone(self):
+        ''' Returns a copy of this client for use by another thread.  suds
+        clients aren't thread safe, the copy shares the parsed WSDL but not
+        the client state '''
+
+        clone = copy.copy(self)
+        clone.client = self.client.clone()
+        return clone
 
     def build_object_cache(self):
         cache = ObjectCache()
@@ -59,6 +278,7 @@ class RegistrationServiceClient(LTASoapService):
     def __init__(self, *args, **kwargs):
         super(RegistrationServiceClient, self).__init__(*args, **kwargs)
 
+    @timed
     def login_user(self, username, password):
         '''Authenticates a username/password against the EE Registration
         Service
@@ -74,6 +294,7 @@ class RegistrationServiceClient(LTASoapService):
 
         return repr(self.client.service.loginUser(username, password))
 
+    @timed
     def get_user_info(self, username, pw):
         '''Retrieves the email address on file for the supplied credentials
 
@@ -99,6 +320,7 @@ class RegistrationServiceClient(LTASoapService):
 
         return userinfo
 
+    @timed
     def get_username(self, contactid):
         '''Retrieves the users EE username given their contactid
 
@@ -128,12 +350,19 @@ class OrderWrapperServiceClient(LTAService):
     def __init__(self, *args, **kwargs):
         super(OrderWrapperServiceClient, self).__init__(*args, **kwargs)
 
-    def verify_scenes(self, scene_list):
+    @timed
+    def verify_scenes(self, scene_list, chunk_size=None, workers=None):
         ''' Checks to make sure the scene list is valid, where valid means
         the scene ids supplied exist in the Landsat inventory and are orderable
 
+        Long lists are split into chunks which are verified concurrently.
+
         Keyword args:
         scene_list A list of scenes to be verified
+        chunk_size The maximum number of scenes in each request.  Defaults
+                   to settings.LTA_VERIFY_CHUNK_SIZE
+        workers The maximum number of concurrent requests.  Defaults to
+                settings.LTA_WORKERS
 
         Returns:
         A dictionary with keys matching the scene list and values are 'true'
@@ -149,6 +378,42 @@ class OrderWrapperServiceClient(LTAService):
 
         '''
 
+        if chunk_size is None:
+            chunk_size = common_settings.LTA_VERIFY_CHUNK_SIZE
+        chunk_size = max(1, int(chunk_size))
+
+        scene_list = list(scene_list)
+
+        chunks = [scene_list[i:i + chunk_size]
+                  for i in xrange(0, len(scene_list), chunk_size)]
+
+        if len(chunks) <= 1:
+            return self.verify_scene_chunk(scene_list)
+
+        if workers is None:
+            workers = common_settings.LTA_WORKERS
+        workers = max(1, min(int(workers), len(chunks)))
+
+        retval = dict()
+
+        pool = ThreadPool(workers)
+        try:
+            results = [pool.apply_async(self.verify_scene_chunk, (chunk,))
+                       for chunk in chunks]
+            pool.close()
+
+            for result in results:
+                retval.update(result.get())
+        finally:
+            pool.terminate()
+            pool.join()
+
+        return retval
+
+    def verify_scene_chunk(self, scene_list):
+        ''' Verifies scenes with a single request to LTA.  See
+        verify_scenes() for the return value '''
+
         #build the service + operation url
         request_url = "%s/%s" % (self.url, 'verifyScenes')
 
@@ -180,44 +445,45 @@ class OrderWrapperServiceClient(LTAService):
         headers['Content-Length'] = len(request_body)
 
         #send the request and check return status
-        #request = urllib2.Request(request_url, request_body, headers)
-        __response = requests.post(request_url,
-                                   data=request_body,
-                                   headers=headers)
-
-        response = None
-
-        if __response.ok:
-            response = __response.content
-        else:
-            msg = StringIO()
-            msg.write("Error in lta.OrderWrapperServiceClient.verify_scenes\n")
-            msg.write("Non 200 response code from service\n")
-            msg.write("Response code was:%s" % __response.status_code)
-            msg.write("Reason:%s" % __response.reason)
-            # Return the code and reason as an exception
-            raise Exception(msg.getvalue())
+        __response = self.session.post(request_url,
+                                       data=request_body,
+                                       headers=headers,
+                                       timeout=self.timeout,
+                                       stream=True)
 
-        __response.close()
-
-        #parse, transform and return response
-        retval = dict()
-        response = response.replace('&', '&amp;')
-        response = response.replace('\n', '')
-
-        root = xml.fromstring(response)
-        scenes = root.getchildren()
+        try:
+            if not __response.ok:
+                msg = StringIO()
+                msg.write("Error in lta.OrderWrapperServiceClient"
+                          ".verify_scenes\n")
+                msg.write("Non 200 response code from service\n")
+                msg.write("Response code was:%s" % __response.status_code)
+                msg.write("Reason:%s" % __response.reason)
+                # Return the code and reason as an exception
+                raise Exception(msg.getvalue())
+
+            #parse the response as it arrives, scenes are the children of
+            #the root element
+            retval = dict()
+            depth = 0
+
+            for event, element in xml.iterparse(
+                    EscapedResponseReader(__response), ('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    continue
 
-        for s in list(scenes):
-            if s.attrib['valid'] == 'true':
-                status = True
-            else:
-                status = False
+                depth -= 1
 
-            retval[s.text] = status
+                if depth == 1:
+                    retval[element.text] = element.attrib['valid'] == 'true'
+                    element.clear()
+        finally:
+            __response.close()
 
         return retval
 
+    @timed
     def order_scenes(self, scene_list, contact_id, priority=5):
         ''' Orders scenes through OrderWrapperService
 
@@ -312,7 +578,10 @@ class OrderWrapperServiceClient(LTAService):
 
         # send the request and check response
 
-        __response = requests.post(request_url, data=payload, headers=headers)
+        __response = self.session.post(request_url,
+                                       data=payload,
+                                       headers=headers,
+                                       timeout=self.timeout)
 
         if __response.ok:
             response = __response.content
@@ -419,6 +688,7 @@ class OrderWrapperServiceClient(LTAService):
 
         return retval
 
+    @timed
     def get_download_urls(self, product_list, contact_id):
         ''' Returns a list of named tuples containing the product id,
         product status, product code, sensor name, and (conditionally) a
@@ -536,7 +806,9 @@ class OrderWrapperServiceClient(LTAService):
         # build service url
         request_url = "%s/%s" % (self.url, 'getDownloadURL')
         payload = build_request(contact_id, product_list)
-        response = requests.post(request_url, data=payload)
+        response = self.session.post(request_url,
+                                     data=payload,
+                                     timeout=self.timeout)
 
         if response.ok:
             return parse_response(response.text)
@@ -570,6 +842,7 @@ class OrderUpdateServiceClient(LTASoapService):
         super(OrderUpdateServiceClient, self).__init__(*args, **kwargs)
 
     #TODO - Migrate this call to the OrderWrapperService
+    @timed
     def get_order_status(self, order_number):
         ''' Returns the status of the supplied order number
 
@@ -601,6 +874,7 @@ class OrderUpdateServiceClient(LTASoapService):
 
         return retval
 
+    @timed
     def update_order(self, order_number, unit_number, status):
         ''' Update the status of orders that ESPA is working on
 
@@ -650,6 +924,7 @@ class OrderDeliveryServiceClient(LTASoapService):
     def __init__(self, *args, **kwargs):
         super(OrderDeliveryServiceClient, self).__init__(*args, **kwargs)
 
+    @timed
     def get_available_orders(self):
         ''' Returns all the orders that were submitted for ESPA through EE
 
@@ -694,9 +969,8 @@ class OrderDeliveryServiceClient(LTASoapService):
                 order[%s] unit[%s]: rejecting" % (u.orderNbr, u.unitNbr))
 
                 # we didn't get an email... fail the order
-                resp = OrderUpdateServiceClient().update_order(u.orderNbr,
-                                                               u.unitNbr,
-                                                               "R")
+                client = get_client(OrderUpdateServiceClient)
+                resp = client.update_order(u.orderNbr, u.unitNbr, "R")
                 # we didn't get a response from the service
                 if not resp.success:
                     raise Exception("Could not update order[%s] unit[%s] \
@@ -716,9 +990,8 @@ class OrderDeliveryServiceClient(LTASoapService):
                 order[%s] unit[%s]: rejecting" % (u.orderNbr, u.unitNbr))
 
                 # didn't get an email... fail the order
-                resp = OrderUpdateServiceClient().update_order(u.orderNbr,
-                                                               u.unitNbr,
-                                                               "R")
+                client = get_client(OrderUpdateServiceClient)
+                resp = client.update_order(u.orderNbr, u.unitNbr, "R")
                 # didn't get a response from the service
                 if not resp.success:
                     raise Exception("Could not update order[%s] unit[%s] \
@@ -743,50 +1016,214 @@ class OrderDeliveryServiceClient(LTASoapService):
         return rtn
 
 
+_session = None
+_session_lock = threading.Lock()
+
+_prototypes = dict()
+_prototypes_lock = threading.Lock()
+
+_clients = threading.local()
+
+
+def get_session():
+    ''' Returns the process wide pooled session all clients share by
+    default '''
+
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = build_session(common_settings.LTA_WORKERS)
+
+        return _session
+
+
+def get_client(client_class):
+    ''' Returns the calling thread's long lived instance of a client.  The
+    first instance of each client in the process is built from the service
+    description, each thread then uses its own clone of it.
+
+    Keyword args:
+    client_class The LTAService subclass to return an instance of
+
+    Returns:
+    An instance of client_class
+    '''
+
+    clients = getattr(_clients, 'clients', None)
+
+    if clients is None:
+        clients = dict()
+        _clients.clients = clients
+
+    client = clients.get(client_class)
+
+    if client is None:
+        with _prototypes_lock:
+            prototype = _prototypes.get(client_class)
+
+            if prototype is None:
+                prototype = client_class()
+                _prototypes[client_class] = prototype
+
+        client = prototype.clone()
+        clients[client_class] = client
+
+    return client
+
+
+def get_latency_snapshot():
+    ''' Returns the current latency statistics, for get_latency_report() '''
+    return metrics.get()
+
+
+def get_latency_report(since=None):
+    ''' Describes the latency of each LTA operation made by this process,
+    or only of those made after the since snapshot '''
+    return metrics.report(since)
+
+
 ''' This is the public interface that calling code should use to interact
     with this module'''
 
 
 def login_user(username, password):
-    return RegistrationServiceClient().login_user(username, password)
+    client = get_client(RegistrationServiceClient)
+    return client.login_user(username, password)
 
 
 def get_user_info(username, password):
-    return RegistrationServiceClient().get_user_info(username, password)
+    client = get_client(RegistrationServiceClient)
+    return client.get_user_info(username, password)
 
 
 def get_user_name(contactid):
-    return RegistrationServiceClient().get_username(contactid)
+    client = get_client(RegistrationServiceClient)
+    return client.get_username(contactid)
 
 
 def verify_scenes(product_list):
-    return OrderWrapperServiceClient().verify_scenes(product_list)
+    client = get_client(OrderWrapperServiceClient)
+    return client.verify_scenes(product_list)
 
 
 def input_exists(product, contact_id):
-    return OrderWrapperServiceClient().input_exists(product, contact_id)
+    client = get_client(OrderWrapperServiceClient)
+    return client.input_exists(product, contact_id)
 
 
 def order_scenes(product_list, contact_id, priority=5):
-    return OrderWrapperServiceClient().order_scenes(product_list,
-                                                    contact_id,
-                                                    priority)
+    client = get_client(OrderWrapperServiceClient)
+    return client.order_scenes(product_list, contact_id, priority)
 
 
 def get_download_urls(product_list, contact_id):
-    return OrderWrapperServiceClient().get_download_urls(product_list,
-                                                         contact_id)
+    client = get_client(OrderWrapperServiceClient)
+    return client.get_download_urls(product_list, contact_id)
 
 
 def get_available_orders():
-    return OrderDeliveryServiceClient().get_available_orders()
+    client = get_client(OrderDeliveryServiceClient)
+    return client.get_available_orders()
 
 
 def get_order_status(lta_order_number):
-    return OrderUpdateServiceClient().get_order_status(lta_order_number)
+    client = get_client(OrderUpdateServiceClient)
+    return client.get_order_status(lta_order_number)
+
+
+def call_concurrently(client_class, method_name, args_list, workers=None):
+    ''' Makes many calls to an LTA SOAP service from a bounded thread pool.
+    Each worker uses its own clone of the client since suds clients aren't
+    thread safe, and all of them share the pooled keep-alive session.
+
+    Keyword args:
+    client_class The LTASoapService subclass to call
+    method_name The name of the client method to call
+    args_list A list of argument tuples, one per call
+    workers The maximum number of concurrent requests.  Defaults to
+            settings.LTA_WORKERS
+
+    Returns:
+    A list with the result of each call in the order of args_list.  Calls
+    which raised have the exception in place of their result.
+    '''
+
+    if len(args_list) == 0:
+        return list()
+
+    if workers is None:
+        workers = common_settings.LTA_WORKERS
+    workers = max(1, min(int(workers), len(args_list)))
+
+    def call(args):
+        try:
+            client = get_client(client_class)
+
+            return getattr(client, method_name)(*args)
+        except Exception, e:
+            return e
+
+    pool = ThreadPool(workers)
+    try:
+        results = [pool.apply_async(call, (args,)) for args in args_list]
+        pool.close()
+
+        return [result.get() for result in results]
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def get_order_statuses(lta_order_numbers, workers=None):
+    ''' Retrieves the status of many orders concurrently
+
+    Keyword args:
+    lta_order_numbers A list of the order numbers to check status on
+    workers The maximum number of concurrent requests
+
+    Returns:
+    A dict of order number:get_order_status() result.  Orders which could
+    not be retrieved are left out.
+    '''
+
+    statuses = dict()
+
+    results = call_concurrently(OrderUpdateServiceClient, 'get_order_status',
+                                [(o,) for o in lta_order_numbers], workers)
+
+    for lta_order_number, result in zip(lta_order_numbers, results):
+        if isinstance(result, Exception):
+            print("Could not get status for order %s: %s"
+                  % (lta_order_number, result))
+        else:
+            statuses[lta_order_number] = result
+
+    return statuses
+
+
+def update_order_statuses(updates, workers=None):
+    ''' Updates the status of many order units concurrently
+
+    Keyword args:
+    updates A list of (lta_order_number, unit_number, new_status) tuples
+    workers The maximum number of concurrent requests
+
+    Returns:
+    A list of the update_order_status() results in the order of updates.
+    Updates which raised are reported as (False, exception message, None)
+    '''
+
+    results = call_concurrently(OrderUpdateServiceClient, 'update_order',
+                                updates, workers)
+
+    for index, result in enumerate(results):
+        if isinstance(result, Exception):
+            results[index] = (False, str(result), None)
+
+    return results
 
 
 def update_order_status(lta_order_number, unit_number, new_status):
-    return OrderUpdateServiceClient().update_order(lta_order_number,
-                                                   unit_number,
-                                                   new_status)
+    client = get_client(OrderUpdateServiceClient)
+    return client.update_order(lta_order_number, unit_number, new_status)
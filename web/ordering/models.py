@@ -1,8 +1,12 @@
 import datetime
+import threading
+import time
 import json
 
 from espa_common import sensor
+from espa_common import settings as common_settings
 
+from django.conf import settings
 from django.db import models
 from django.db import transaction
 from django.contrib.auth.models import User
@@ -375,25 +379,35 @@ class Order(models.Model):
         order.save()
 
         # save the scenes for the order
+        now = datetime.datetime.now()
+
+        scenes = list()
+
         for s in set(scene_list):
 
             sensor_type = None
 
             if s == 'plot':
                 sensor_type = 'plot'
-            elif isinstance(sensor.instance(s), sensor.Landsat):
-                sensor_type = 'landsat'
-            elif isinstance(sensor.instance(s), sensor.Modis):
-                sensor_type = 'modis'
+            else:
+                product = sensor.instance(s)
+
+                if isinstance(product, sensor.Landsat):
+                    sensor_type = 'landsat'
+                elif isinstance(product, sensor.Modis):
+                    sensor_type = 'modis'
 
             scene = Scene()
             scene.name = s
             scene.order = order
-            scene.order_date = datetime.datetime.now()
+            scene.order_date = now
             scene.status = 'submitted'
             scene.sensor_type = sensor_type
             scene.note = ''
-            scene.save()
+            scenes.append(scene)
+
+        batch_size = common_settings.BULK_CREATE_BATCH_SIZE
+        Scene.objects.bulk_create(scenes, batch_size=batch_size)
 
         return order
 
@@ -510,11 +524,71 @@ class Configuration(models.Model):
     def __unicode__(self):
         return ('%s : %s') % (self.key, self.value)
 
+    # every key/value, loaded in one query and shared across the process
+    # until settings.CONFIGURATION_CACHE_TIMEOUT seconds have passed
+    _cache = {}
+    _cache_expires = 0
+    _cache_lock = threading.Lock()
+
+    def save(self, *args, **kwargs):
+        super(Configuration, self).save(*args, **kwargs)
+        Configuration.clear_cache()
+
+    def delete(self, *args, **kwargs):
+        super(Configuration, self).delete(*args, **kwargs)
+        Configuration.clear_cache()
+
+    @classmethod
+    def clear_cache(cls):
+        '''Forces the values to be reloaded on next use'''
+        with cls._cache_lock:
+            cls._cache_expires = 0
+
+    @classmethod
+    def load_cache(cls):
+        '''Loads every key/value in one query'''
+
+        values = dict(cls.objects.values_list('key', 'value'))
+
+        with cls._cache_lock:
+            cls._cache = values
+            cls._cache_expires = (time.time() +
+                                  settings.CONFIGURATION_CACHE_TIMEOUT)
+
+        return values
+
+    @classmethod
+    def getValues(cls, keys):
+        '''Retrieves many configuration values at once
+
+        Keyword args:
+        keys -- A list of configuration keys
+
+        Returns:
+        A dict of key:value, with '' for any key that is not configured
+        '''
+
+        with cls._cache_lock:
+            values = cls._cache
+            if time.time() >= cls._cache_expires:
+                values = None
+
+        if values is None:
+            values = cls.load_cache()
+
+        results = {}
+
+        for key in keys:
+            try:
+                results[key] = str(values[key])
+            except:
+                results[key] = ''
+
+        return results
+
     def getValue(self, key):
         try:
-            value = Configuration.objects.get(key=key).value
-
-            return str(value)
+            return Configuration.getValues([key])[key]
         except:
             return ''
 
@@ -1,6 +1,7 @@
 # Create your views here.
 from django.http import HttpResponse
 from SimpleXMLRPCServer import SimpleXMLRPCDispatcher
+import xmlrpclib
 from django.views.decorators.csrf import csrf_exempt
 from ordering import core
 from ordering.models import Configuration
@@ -24,12 +25,15 @@ def rpc_handler(request):
 
     if len(request.body):
         d.register_function(_update_status, 'update_status')
+        d.register_function(_update_statuses, 'update_statuses')
         d.register_function(_set_product_error, 'set_scene_error')
         d.register_function(_set_product_unavailable, 'set_scene_unavailable')
         d.register_function(_mark_product_complete, 'mark_scene_complete')
+        d.register_function(_mark_products_complete, 'mark_scenes_complete')
         d.register_function(_handle_orders, 'handle_orders')
         d.register_function(_queue_products, 'queue_products')
         d.register_function(_get_configuration, 'get_configuration')
+        d.register_function(_get_configurations, 'get_configurations')
         d.register_function(_get_products_to_process, 'get_scenes_to_process')
         d.register_function(_get_data_points, 'get_data_points')
 
@@ -60,6 +64,14 @@ def _update_status(name, orderid, processing_loc, status):
         return core.update_status(name, orderid, processing_loc, status)
 
 
+def _update_statuses(status_list):
+    '''Updates the status of many products in one call.  Takes a list of
+    [name, orderid, processing_loc, status] lists and returns a list of the
+    [name, orderid] which were not found'''
+
+    return core.update_statuses([tuple(s) for s in status_list])
+
+
 def _set_product_error(name, orderid, processing_loc, error):
     return core.set_product_error(name, orderid, processing_loc, error)
 
@@ -100,6 +112,24 @@ def _mark_product_complete(name,
                                       log_file_contents)
 
 
+def _mark_products_complete(complete_list):
+    '''Marks many products complete in one call.  Takes a list of [name,
+    orderid, processing_loc, completed_scene_location, cksum_file_location,
+    log_file_contents] lists and returns a list of the [name, orderid] which
+    were not found'''
+
+    products = list()
+
+    for c in complete_list:
+        log_file_contents = c[5]
+        if isinstance(log_file_contents, xmlrpclib.Binary):
+            log_file_contents = log_file_contents.data
+
+        products.append((c[0], c[1], c[2], c[3], c[4], log_file_contents))
+
+    return core.mark_products_complete(products)
+
+
 def _handle_orders():
     return core.handle_orders()
 
@@ -109,6 +139,11 @@ def _get_configuration(key):
     return Configuration().getValue(key)
 
 
+#retrieve many configuration values in one call
+def _get_configurations(keys):
+    return Configuration.getValues(keys)
+
+
 def _get_products_to_process(limit, for_user, priority, product_types):
 
     return core.get_products_to_process(record_limit=limit,
@@ -1,18 +1,137 @@
 import lta
 import lpdaac
+import threading
+import collections
 from models import Order
 
+from django.conf import settings
+from django.core.cache import cache
+
 from espa_common import sensor
 from espa_common import utilities
 from espa_common.validation import Validator
 
 
+class VerificationMemo(object):
+    '''Remembers whether products were found in inventory so they are only
+    verified once per request.  Results are also kept in the shared cache for
+    PRODUCT_VERIFICATION_CACHE_TIMEOUT seconds so resubmitted orders don't
+    verify them again.
+
+    Pass an instance to the validators as the 'verification_memo' parameter.
+    '''
+
+    # process wide counts of where results came from
+    counters = collections.Counter()
+    counters_lock = threading.Lock()
+
+    def __init__(self):
+        self.results = {}
+        self.counts = collections.Counter()
+
+    def cache_key(self, source, product_id):
+        return 'verified_%s_%s' % (source, product_id)
+
+    def verify(self, source, product_ids, verify_function):
+        '''Retrieves the verification result of each product, calling
+        verify_function only for products with no remembered result
+
+        Keyword args:
+        source -- Name of the inventory the products are verified against
+        product_ids -- A list of product ids
+        verify_function -- Called with a list of product ids, returns a dict
+                           of product_id:True/False
+
+        Returns:
+        A dict of product_id:True/False
+        '''
+
+        counts = collections.Counter()
+
+        results = {}
+        unknown = list()
+
+        for product_id in set(product_ids):
+            if (source, product_id) in self.results:
+                results[product_id] = self.results[source, product_id]
+                counts['request'] += 1
+            else:
+                unknown.append(product_id)
+
+        if len(unknown) > 0:
+            keys = dict((self.cache_key(source, p), p) for p in unknown)
+
+            for key, valid in cache.get_many(keys.keys()).iteritems():
+                results[keys[key]] = valid
+                counts['cache'] += 1
+
+            unknown = [p for p in unknown if not p in results]
+
+        if len(unknown) > 0:
+            verified = verify_function(unknown)
+
+            counts['verified'] += len(unknown)
+
+            values = dict()
+            for product_id in unknown:
+                valid = bool(verified.get(product_id, False))
+                results[product_id] = valid
+                values[self.cache_key(source, product_id)] = valid
+
+            cache.set_many(values,
+                           timeout=settings.PRODUCT_VERIFICATION_CACHE_TIMEOUT)
+
+        for product_id, valid in results.iteritems():
+            self.results[source, product_id] = valid
+
+        self.counts.update(counts)
+
+        with VerificationMemo.counters_lock:
+            VerificationMemo.counters.update(counts)
+
+        return results
+
+    @staticmethod
+    def hit_rate(counts):
+        '''Returns the fraction of results that did not need verifying'''
+
+        total = sum(counts.values())
+
+        if total == 0:
+            return 0.0
+
+        return float(counts['request'] + counts['cache']) / total
+
+    def summary(self):
+        '''Describes the hit rates of this memo and of the process'''
+
+        with VerificationMemo.counters_lock:
+            counters = collections.Counter(VerificationMemo.counters)
+
+        return ("product verification: request hits:%d cache hits:%d "
+                "verified:%d hit rate:%.2f (process hit rate:%.2f)"
+                % (self.counts['request'], self.counts['cache'],
+                   self.counts['verified'], self.hit_rate(self.counts),
+                   self.hit_rate(counters)))
+
+
+def get_verification_memo(parameters):
+    '''Returns the memo passed with the validator parameters, or a new one'''
+
+    memo = parameters.get('verification_memo')
+
+    if memo is None:
+        memo = VerificationMemo()
+
+    return memo
+
+
 class ModisProductListValidator(Validator):
     '''Validates that a scene list has been provided and it contains at
     least one scene to process'''
 
     def get_verified_input_product_set(self, input_products):
-        valid_products = list()
+        request = list()
 
         for p in input_products:
 
@@ -20,10 +139,16 @@ class ModisProductListValidator(Validator):
                 p = sensor.instance(p)
 
             if isinstance(p, sensor.Modis):
-                if lpdaac.input_exists(p):
-                    valid_products.append(p.product_id)
+                request.append(p.product_id)
 
-        return set(valid_products)
+        if len(request) == 0:
+            return set()
+
+        memo = get_verification_memo(self.parameters)
+
+        verified = memo.verify('modis', request, lpdaac.verify_products)
+
+        return set([p for p, valid in verified.iteritems() if valid])
 
     def errors(self):
         '''Looks through the input_product_list if present and determines
@@ -101,7 +226,9 @@ class LandsatProductListValidator(Validator):
                 if isinstance(p, sensor.Landsat):
                     request.append(p.product_id)
 
-            verified = lta.verify_scenes(request)
+            memo = get_verification_memo(self.parameters)
+
+            verified = memo.verify('landsat', request, lta.verify_scenes)
 
             for product_name, valid in verified.iteritems():
                 if valid:
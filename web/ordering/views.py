@@ -1,5 +1,8 @@
 import json
+import hashlib
+import datetime
 import collections
+from cStringIO import StringIO
 from espa_common import sensor
 import emails
 
@@ -8,6 +11,7 @@ import django.contrib.auth
 from espa_common import utilities
 
 from ordering import validators
+from ordering import core
 from ordering.models import Scene
 from ordering.models import Order
 from ordering.models import Configuration as Config
@@ -17,16 +21,22 @@ from ordering.models import DownloadSection
 from django import forms
 from django.db import connection
 from django.conf import settings
+from django.contrib.sites.models import get_current_site
 from django.contrib.syndication.views import Feed
+from django.contrib.syndication.views import add_domain
 from django.core.urlresolvers import reverse
 from django.core.cache import cache
 from django.db.models import Q
 from django.http import HttpResponse
+from django.http import HttpResponseBadRequest
+from django.http import StreamingHttpResponse
 from django.http import HttpResponseRedirect
 from django.http import Http404
 from django.template import loader
 from django.template import RequestContext
 from django.utils.feedgenerator import Rss201rev2Feed
+from django.utils.xmlutils import SimplerXMLGenerator
+from django.views.decorators.http import condition
 from django.views.generic import View
 
 from django.contrib.auth.models import User
@@ -238,12 +248,13 @@ class NewOrder(AbstractView):
 
         return retval
 
-    def _get_verified_input_product_list(self, request):
+    def _get_verified_input_product_list(self, request, memo=None):
 
         ipl = self._get_input_product_list(request)
 
         if ipl:
-            payload = {'input_products': ipl.input_products}
+            payload = {'input_products': ipl.input_products,
+                       'verification_memo': memo}
 
             lplv = validators.LandsatProductListValidator(payload)
 
@@ -302,6 +313,11 @@ class NewOrder(AbstractView):
         # junk they included in their input file
         validator_parameters['input_products'] = ipl.input_products
 
+        # the products are verified while validating and again when the
+        # order is entered, this makes sure the inventory is only asked once
+        memo = validators.VerificationMemo()
+        validator_parameters['verification_memo'] = memo
+
         validator = validators.NewOrderValidator(validator_parameters)
 
         validation_errors = validator.errors()
@@ -337,7 +353,9 @@ class NewOrder(AbstractView):
 
         else:
 
-            vipl = self._get_verified_input_product_list(request)
+            vipl = self._get_verified_input_product_list(request, memo)
+
+            print(memo.summary())
 
             order_options = self._get_order_options(request)
 
@@ -472,7 +490,18 @@ class ListOrdersForm(forms.Form):
 
 
 class StatusFeed(Feed):
-    '''Feed subclass to publish user orders via RSS'''
+    '''Feed subclass to publish user orders via RSS
+
+    The feed may be limited with the query parameters:
+    orderid -- Only include products from this order
+    since -- Only include products completed on or after this date (YYYY-MM-DD)
+    page -- Page number, starting at 1, of the products to include
+    page_size -- Number of products per page (defaults to
+                 settings.STATUS_FEED_PAGE_SIZE)
+
+    The feed is streamed as rows are read from the database, and is not
+    rendered when the client already holds the latest version.
+    '''
 
     feed_type = Rss201rev2Feed
 
@@ -482,48 +511,194 @@ class StatusFeed(Feed):
 
     email = ""
 
-    def dictfetchall(self, cursor):
-        "Returns all rows from a cursor as a dict"
-        desc = cursor.description
-        return [
-            dict(zip([col[0] for col in desc], row))
-            for row in cursor.fetchall() ]
+    def __call__(self, request, email):
+        try:
+            filters = self.get_filters(request)
+        except ValueError, e:
+            return HttpResponseBadRequest(str(e))
 
-    def get_object(self, request, email):
-        self.email = email
+        def etag(request, email):
+            modified = self.last_modified(request, email)
+            key = '|'.join([email.lower(), modified.isoformat(),
+                            repr(sorted(filters.items()))])
+            return hashlib.md5(key).hexdigest()
+
+        def stream(request, email):
+            feed = self.stream_feed(request, email, filters)
+            response = StreamingHttpResponse(feed,
+                                             content_type=self.content_type)
+            return response
+
+        view = condition(etag_func=etag,
+                         last_modified_func=self.last_modified)(stream)
+
+        return view(request, email)
+
+    @property
+    def content_type(self):
+        return '%s; charset=utf-8' % self.feed_type.mime_type
+
+    def get_filters(self, request):
+        '''Validates the filtering and paging query parameters'''
+
+        filters = {}
+
+        if request.GET.get('orderid'):
+            filters['orderid'] = request.GET['orderid']
+
+        if request.GET.get('since'):
+            try:
+                filters['since'] = datetime.datetime.strptime(
+                    request.GET['since'], '%Y-%m-%d')
+            except ValueError:
+                raise ValueError("since must be formatted as YYYY-MM-DD")
+
+        if request.GET.get('page') or request.GET.get('page_size'):
+            default_size = settings.STATUS_FEED_PAGE_SIZE
+
+            try:
+                page = int(request.GET.get('page', 1))
+                page_size = int(request.GET.get('page_size', default_size))
+            except ValueError:
+                raise ValueError("page and page_size must be integers")
+
+            if page < 1 or page_size < 1:
+                raise ValueError("page and page_size must be positive")
+
+            filters['limit'] = min(page_size,
+                                   settings.STATUS_FEED_MAX_PAGE_SIZE)
+            filters['offset'] = (page - 1) * filters['limit']
+
+        return filters
+
+    def last_modified(self, request, email):
+        '''Returns the latest completion date of the products for email.  It
+        is cached until another product completes so unchanged feeds are
+        answered without querying the products.'''
+
+        if hasattr(request, 'status_feed_modified'):
+            return request.status_feed_modified
+
+        key = core.status_feed_cache_key(email)
+
+        modified = cache.get(key)
+
+        if modified is None:
+            query = ("select max(p.completion_date) "
+                     "from auth_user u, ordering_order o, ordering_scene p "
+                     "where u.id = o.user_id and o.id = p.order_id "
+                     "and p.status ='complete' and u.email = %s")
+
+            cursor = connection.cursor()
+            try:
+                cursor.execute(query, [email])
+                modified = cursor.fetchone()[0]
+            finally:
+                cursor.close()
+
+            # no completed products
+            if modified is None:
+                raise Http404
+
+            cache.set(key, modified,
+                      timeout=settings.STATUS_FEED_CACHE_TIMEOUT)
+
+        request.status_feed_modified = modified
 
-        query = ("select u.email, o.orderid, o.order_date, p.name,"
+        return modified
+
+    def get_rows(self, email, filters):
+        '''Yields the completed products for email one at a time'''
+
+        query = ["select u.email, o.orderid, o.order_date, p.name,"
                  "p.product_dload_url, p.status "
                  "from auth_user u, ordering_order o, ordering_scene p "
                  "where u.id = o.user_id and o.id = p.order_id "
-                 "and p.status ='complete' and u.email = %s")
+                 "and p.status ='complete' and u.email = %s"]
+        params = [email]
+
+        if 'orderid' in filters:
+            query.append(" and o.orderid = %s")
+            params.append(filters['orderid'])
+
+        if 'since' in filters:
+            query.append(" and p.completion_date >= %s")
+            params.append(filters['since'])
 
-        results = None
+        query.append(" order by p.id")
+
+        if 'limit' in filters:
+            query.append(" limit %s offset %s")
+            params.extend([filters['limit'], filters['offset']])
 
         cursor = connection.cursor()
+        try:
+            cursor.execute(''.join(query), params)
 
-        if cursor is not None:
-            try:
-                cursor.execute(query, [email])
-                results = self.dictfetchall(cursor)
-            finally:
-                if cursor is not None:
-                    cursor.close()
-    
-        if not results or len(results) == 0:
-            raise Http404
-        else:
-            return results
+            columns = [col[0] for col in cursor.description]
+
+            while True:
+                rows = cursor.fetchmany(settings.STATUS_FEED_FETCH_SIZE)
+                if not rows:
+                    break
+
+                for row in rows:
+                    yield dict(zip(columns, row))
+        finally:
+            cursor.close()
+
+    def stream_feed(self, request, email, filters):
+        '''Renders the feed, yielding the output as each product is written
+        rather than building the whole document'''
+
+        self.email = email
+
+        # RSS requires absolute links, qualify them as Feed.get_feed does
+        domain = get_current_site(request).domain
+        secure = request.is_secure()
+
+        link = add_domain(domain,
+                          reverse('status_feed', kwargs={'email': email}),
+                          secure)
+
+        feed = self.feed_type(title=self.title,
+                              link=link,
+                              description=self.description({'email': email}),
+                              feed_url=add_domain(domain, request.path,
+                                                  secure))
+
+        output = StringIO()
+        handler = SimplerXMLGenerator(output, 'utf-8')
+
+        handler.startDocument()
+        handler.startElement('rss', feed.rss_attributes())
+        handler.startElement('channel', feed.root_attributes())
+        feed.add_root_elements(handler)
+
+        for row in self.get_rows(email, filters):
+            feed.add_item(title=self.item_title(row),
+                          link=add_domain(domain, self.item_link(row),
+                                          secure),
+                          description=self.item_description(row))
+            item = feed.items.pop()
+
+            handler.startElement('item', feed.item_attributes(item))
+            feed.add_item_elements(handler, item)
+            handler.endElement('item')
+
+            if output.tell() >= settings.STATUS_FEED_BUFFER_SIZE:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
 
-    def items(self, results):
-        return results
+        handler.endElement('channel')
+        handler.endElement('rss')
+        handler.endDocument()
 
-    def link(self, results):
-        return reverse('status_feed',
-                       kwargs={'email': results[0]['email']})
+        yield output.getvalue()
 
-    def description(self, results):
-        return "ESPA scene status for:%s" % results[0]['email']
+    def description(self, result):
+        return "ESPA scene status for:%s" % result['email']
 
     def item_title(self, result):
         return result['name']